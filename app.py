@@ -7,16 +7,27 @@ from shiny.types import FileInfo
 
 from apps.server import (
     about_prediction_service,
+    get_coalesced_prediction_data,
     get_merged_prediction_data,
     github_text,
     load_image,
 )
-from utils.constants import AppPredictionMode
-from utils.helper import prepare_batch_prediction_data, prepare_single_prediction_data
+from utils.constants import AppPredictionMode, FileFormat
+from utils.helper import (
+    FILE_FORMAT_EXTENSIONS,
+    get_file_format,
+    prepare_batch_prediction_data,
+    prepare_single_prediction_data,
+    read_batch_prediction_data,
+)
 
 # define your endpoint name here
 ENPOINT_NAME: str = "iris-prediction-endpoint-2024-11-03-20-59-48"
 
+# set to a local path or s3 uri of a model.tar.gz to serve predictions
+# in-process instead of from the endpoint above
+LOCAL_MODEL_PATH: str | None = None
+
 app_ui = ui.page_sidebar(
     ui.sidebar(
         ui.input_selectize(
@@ -46,8 +57,11 @@ def server(input: Inputs, output: Outputs, session: Session):
     def parsed_file():
         file: list[FileInfo] | None = input.batch_csv()
         if file is None:
-            return pd.DataFrame()
-        return pd.read_csv(file[0]["datapath"])
+            return pd.DataFrame(), None
+        return read_batch_prediction_data(
+            path=file[0]["datapath"],
+            file_format=get_file_format(file[0]["name"]) or FileFormat.CSV,
+        )
 
     @reactive.calc
     @reactive.event(input.get_prediction_btn)
@@ -61,15 +75,17 @@ def server(input: Inputs, output: Outputs, session: Session):
             )
 
         elif input.prediction_type() == AppPredictionMode.BATCH:
-            prepared_data, err = prepare_batch_prediction_data(
-                uploaded_data=parsed_file()
-            )
+            prepared_data, err = parsed_file()
+            if err is None:
+                prepared_data, err = prepare_batch_prediction_data(
+                    uploaded_data=prepared_data
+                )
 
         return prepared_data, err
 
     @render.data_frame
     def summary():
-        df = parsed_file()
+        df, _ = parsed_file()
 
         if df.empty:
             return pd.DataFrame()
@@ -145,8 +161,8 @@ def server(input: Inputs, output: Outputs, session: Session):
                 ui.card(
                     ui.input_file(
                         "batch_csv",
-                        "Upload a CSV file",
-                        accept=[".csv"],
+                        "Upload a CSV, Parquet or Arrow file",
+                        accept=list(FILE_FORMAT_EXTENSIONS),
                         multiple=False,
                     ),
                     ui.input_checkbox_group(
@@ -162,7 +178,7 @@ def server(input: Inputs, output: Outputs, session: Session):
         return ui.markdown("Select a prediction type to proceed.")
 
     @render.ui
-    def prediction_table():
+    async def prediction_table():
         prepared_data, err = get_prepared_data()
 
         if err is not None:
@@ -177,10 +193,18 @@ def server(input: Inputs, output: Outputs, session: Session):
         with ui.Progress(min=0, max=1) as p:
             p.set(message="Getting predictions", detail="This may take a while...")
             p.inc(amount=0.5, message="Predicting...")
-            merged_prediction_data = get_merged_prediction_data(
-                prepared_data=prepared_data,
-                endpoint_name=ENPOINT_NAME,
-            )
+            if input.prediction_type() == AppPredictionMode.SINGLE:
+                merged_prediction_data = await get_coalesced_prediction_data(
+                    prepared_data=prepared_data,
+                    endpoint_name=ENPOINT_NAME,
+                    local_model_path=LOCAL_MODEL_PATH,
+                )
+            else:
+                merged_prediction_data = get_merged_prediction_data(
+                    prepared_data=prepared_data,
+                    endpoint_name=ENPOINT_NAME,
+                    local_model_path=LOCAL_MODEL_PATH,
+                )
             p.inc(amount=0.9, message="Predicting...")
             p.close()
 
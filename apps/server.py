@@ -1,21 +1,32 @@
+import asyncio
 from pathlib import Path
 
 import pandas as pd
 from shiny import ui
 from shiny.types import ImgData
 
-from steps import predict_iris
+from steps import get_coalescer, get_predictor, predict_iris
+from utils.constants import PredictionBackend
 from utils.helper import get_iris_dictionary
 
 
 # TODO: handle the case when data is not valid
 def get_merged_prediction_data(
-    prepared_data: pd.DataFrame, endpoint_name: str
+    prepared_data: pd.DataFrame,
+    endpoint_name: str,
+    local_model_path: str | None = None,
 ) -> pd.DataFrame:
     request_body = {"Input": prepared_data.values.tolist()}
     predictions = predict_iris(
         request_body=request_body,
         endpoint_name=endpoint_name,
+        predictor=(
+            get_predictor(
+                backend=PredictionBackend.LOCAL, model_path=local_model_path
+            )
+            if local_model_path is not None
+            else None
+        ),
     )
 
     prepared_data["predicted iris"] = predictions
@@ -26,6 +37,37 @@ def get_merged_prediction_data(
     return prepared_data
 
 
+async def get_coalesced_prediction_data(
+    prepared_data: pd.DataFrame,
+    endpoint_name: str,
+    local_model_path: str | None = None,
+) -> pd.DataFrame:
+    # single-sample requests from concurrent sessions are batched together;
+    # awaiting the result keeps the event loop free for the other sessions
+    coalescer = get_coalescer(
+        backend=(
+            PredictionBackend.LOCAL
+            if local_model_path is not None
+            else PredictionBackend.SAGEMAKER
+        ),
+        model_path=local_model_path,
+    )
+    futures = [
+        coalescer.submit(
+            row=[float(value) for value in row], endpoint_name=endpoint_name
+        )
+        for row in prepared_data.values.tolist()
+    ]
+    predictions = await asyncio.gather(*map(asyncio.wrap_future, futures))
+
+    prepared_data["predicted iris"] = predictions
+    prepared_data["predicted iris"] = prepared_data["predicted iris"].map(
+        get_iris_dictionary()
+    )
+
+    return prepared_data
+
+
 def load_image(image_path: Path) -> ImgData:
     img: ImgData = {
         "src": image_path,
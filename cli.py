@@ -8,15 +8,18 @@ from pipelines import (
     evidently_data_drift_monitoring_pipeline,
     evidently_model_drift_monitoring_pipeline,
     inference_pipeline,
+    prefix_inference_pipeline,
     training_pipeline,
 )
 from utils.constants import (
     Clean,
     DataDrift,
     Deploy,
+    FileFormat,
     Inference,
     Ingest,
     ModelDrift,
+    PredictionBackend,
     Train,
 )
 
@@ -62,7 +65,17 @@ def clean() -> None:
     already exist in the s3 bucket.
     """,
 )
-def train(force_upload: bool) -> None:
+@click.option(
+    "--incremental",
+    is_flag=True,
+    default=False,
+    help="""
+    If this flag is given, the latest approved model is trained
+    further on the new data in the s3 incremental train data
+    path only, instead of training a new model on all train data.
+    """,
+)
+def train(force_upload: bool, incremental: bool) -> None:
     """
     Ingest data, train, evaluate and register model.
     """
@@ -73,7 +86,12 @@ def train(force_upload: bool) -> None:
     run_args.update(Ingest.ARGS)
 
     data_ingestion_pipeline(**run_args)
-    training_pipeline(**Train.ARGS)
+
+    run_args = {}
+    run_args["incremental"] = incremental
+    run_args.update(Train.ARGS)
+
+    training_pipeline(**run_args)
 
     return None
 
@@ -132,7 +150,32 @@ def datadrift(endpoint_name: str) -> None:
     "current-data-s3-uri",
     type=click.STRING,
 )
-def modeldrift(endpoint_name: str, current_data_s3_uri: str) -> None:
+@click.option(
+    "--backend",
+    type=click.Choice([backend.value for backend in PredictionBackend]),
+    default=PredictionBackend.SAGEMAKER.value,
+    show_default=True,
+    help="""
+    Where predictions are computed. With 'local', the model artifact given
+    by --model-path is loaded and scored in-process instead of
+    invoking ENDPOINT_NAME.
+    """,
+)
+@click.option(
+    "--model-path",
+    type=click.STRING,
+    default=None,
+    help="""
+    Local path or s3 uri of a model.tar.gz (or model.joblib) artifact;
+    required with '--backend local'.
+    """,
+)
+def modeldrift(
+    endpoint_name: str,
+    current_data_s3_uri: str,
+    backend: str,
+    model_path: str | None,
+) -> None:
     """
     Run model drift monitoring pipeline against the ENDPOINT_NAME.
 
@@ -142,9 +185,14 @@ def modeldrift(endpoint_name: str, current_data_s3_uri: str) -> None:
     deployed endpoint and the ground truth.
     """
 
+    if backend == PredictionBackend.LOCAL and model_path is None:
+        raise click.UsageError("'--model-path' is required with '--backend local'.")
+
     run_args = {}
     run_args["endpoint_name"] = endpoint_name
     run_args["current_data_s3_uri"] = current_data_s3_uri
+    run_args["prediction_backend"] = backend
+    run_args["local_model_path"] = model_path
     run_args.update(ModelDrift.ARGS)
 
     evidently_model_drift_monitoring_pipeline(**run_args)
@@ -160,22 +208,139 @@ def modeldrift(endpoint_name: str, current_data_s3_uri: str) -> None:
 @click.argument(
     "inference-file-name",
     type=click.STRING,
+    required=False,
+)
+@click.option(
+    "--backend",
+    type=click.Choice([backend.value for backend in PredictionBackend]),
+    default=PredictionBackend.SAGEMAKER.value,
+    show_default=True,
+    help="""
+    Where predictions are computed. With 'local', the model artifact given
+    by --model-path is loaded and scored in-process instead of
+    invoking ENDPOINT_NAME.
+    """,
+)
+@click.option(
+    "--model-path",
+    type=click.STRING,
+    default=None,
+    help="""
+    Local path or s3 uri of a model.tar.gz (or model.joblib) artifact;
+    required with '--backend local'.
+    """,
 )
-def inference(endpoint_name: str, inference_file_name: str) -> None:
+@click.option(
+    "--input-format",
+    type=click.Choice([file_format.value for file_format in FileFormat]),
+    default=None,
+    help="""
+    Format of the inference file(s). By default it is picked from the
+    file extension (.csv, .parquet/.pq or .arrow/.feather); parquet and
+    arrow files are read with only the feature columns.
+    """,
+)
+@click.option(
+    "--output-format",
+    type=click.Choice([file_format.value for file_format in FileFormat]),
+    default=FileFormat.CSV.value,
+    show_default=True,
+    help="""
+    Format of the prediction file(s). Parquet and arrow files are
+    zstd-compressed. Streaming mode only writes csv.
+    """,
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    default=False,
+    help="""
+    If this flag is given, the inference file is read, scored and
+    written in chunks so that memory use does not grow with the
+    size of the file. Progress is checkpointed, and a rerun on the
+    same file resumes from the last scored chunk.
+    """,
+)
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=100_000,
+    show_default=True,
+    help="Number of rows per chunk in streaming mode.",
+)
+@click.option(
+    "--max-in-flight",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Maximum number of chunks being scored at once in streaming mode.",
+)
+@click.option(
+    "--all-files",
+    is_flag=True,
+    default=False,
+    help="""
+    If this flag is given, every csv, parquet or arrow file under the
+    s3 bucket inference prefix is scored instead of INFERENCE_FILE_NAME. Files already
+    scored by the current model version are skipped.
+    """,
+)
+@click.option(
+    "--max-workers",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Maximum number of files being scored at once with --all-files.",
+)
+def inference(
+    endpoint_name: str,
+    inference_file_name: str | None,
+    backend: str,
+    model_path: str | None,
+    input_format: str | None,
+    output_format: str,
+    stream: bool,
+    chunk_size: int,
+    max_in_flight: int,
+    all_files: bool,
+    max_workers: int,
+) -> None:
     """
-    Run model drift monitoring pipeline against the ENDPOINT_NAME.
+    Run inference pipeline against the ENDPOINT_NAME.
 
     ENDPOINT_NAME: name of the deployed sagemaker endpoint.
 
     INFERENCE_FILE_NAME: name of the inference data file in the
-    s3 bucket prefix. Must be of the form "*.csv".
+    s3 bucket prefix, e.g. "*.csv" or "*.parquet". Not needed
+    with --all-files. With '--backend local', it can also be the
+    path of a local file, whose predictions are written next to it.
     """
 
+    if backend == PredictionBackend.LOCAL and model_path is None:
+        raise click.UsageError("'--model-path' is required with '--backend local'.")
+    if (inference_file_name is None) != all_files:
+        raise click.UsageError(
+            "Give either INFERENCE_FILE_NAME or the '--all-files' flag."
+        )
+    if stream and output_format != FileFormat.CSV:
+        raise click.UsageError("'--stream' only writes csv predictions.")
+
     run_args = {}
     run_args["deployed_endpoint_name"] = endpoint_name
-    run_args["inference_file_name"] = inference_file_name
+    run_args["prediction_backend"] = backend
+    run_args["local_model_path"] = model_path
+    run_args["input_format"] = input_format
+    run_args["output_format"] = output_format
+    run_args["stream"] = stream
+    run_args["chunk_size"] = chunk_size
+    run_args["max_in_flight"] = max_in_flight
     run_args.update(Inference.ARGS)
 
-    inference_pipeline(**run_args)
+    if all_files:
+        run_args["max_workers"] = max_workers
+        prefix_inference_pipeline(**run_args)
+    else:
+        run_args["inference_file_name"] = inference_file_name
+        inference_pipeline(**run_args)
 
     return None
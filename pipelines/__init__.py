@@ -1,6 +1,6 @@
 from pipelines.cleaning import cleanup_pipeline
 from pipelines.deployment import deployment_pipeline
-from pipelines.inference import inference_pipeline
+from pipelines.inference import inference_pipeline, prefix_inference_pipeline
 from pipelines.ingestion import data_ingestion_pipeline
 from pipelines.monitoring import (
     evidently_data_drift_monitoring_pipeline,
@@ -19,6 +19,7 @@ def deployment_pipeline(
     data_capture_destination_uri: str,
     serverless: bool,
     serverless_inference_config: dict,
+    warmup_rows: int,
 ) -> None:
     logger.info("Model deployment pipeline has started.")
 
@@ -37,6 +38,7 @@ def deployment_pipeline(
         data_capture_destination_uri=data_capture_destination_uri,
         serverless=serverless,
         serverless_inference_config=serverless_inference_config,
+        warmup_rows=warmup_rows,
     )
 
     logger.info("Model deployment pipeline finished successfuly.")
@@ -1,54 +1,325 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime as dt
+from typing import Any
 
-import pandas as pd
 from sagemaker.session import Session
 
-from steps import predict_iris
-from utils.constants import DataField
+from steps import (
+    CachingPredictor,
+    Predictor,
+    get_predictor,
+    list_s3_objects,
+    predict_iris,
+    stream_predictions,
+)
+from utils.constants import DataField, FileFormat, PredictionBackend
 from utils.helper import (
+    get_file_format,
     get_logger,
     prepare_batch_prediction_data,
+    read_batch_prediction_data,
+    write_tabular_data,
 )
 
 logger = get_logger(__name__)
 
 
+def _model_version_slug(predictor: Predictor, endpoint_name: str) -> str:
+    # model versions such as "<group name>/<version>" or local paths, made
+    # safe to use in an s3 key
+    return re.sub(
+        r"[^A-Za-z0-9._-]+", "-", predictor.model_version(endpoint_name)
+    ).strip("-")
+
+
+def score_inference_file(
+    s3_client: Any,
+    bucket: str,
+    input_key: str,
+    input_format: FileFormat,
+    output_key: str,
+    output_format: FileFormat,
+    checkpoint_prefix: str | None,
+    endpoint_name: str,
+    predictor: Predictor,
+    stream: bool,
+    chunk_size: int,
+    max_in_flight: int,
+) -> str | None:
+    """
+    Score one inference file and write it with its predictions to output_key.
+    Returns an error message, if any.
+    """
+    if stream:
+        logger.info(
+            f"Streaming predictions for {input_key} in chunks of {chunk_size} rows "
+            f"with at most {max_in_flight} chunks in flight..."
+        )
+        _, err = stream_predictions(
+            s3_client=s3_client,
+            input_bucket=bucket,
+            input_key=input_key,
+            input_format=input_format,
+            output_bucket=bucket,
+            output_key=output_key,
+            checkpoint_prefix=checkpoint_prefix,
+            endpoint_name=endpoint_name,
+            predictor=predictor,
+            chunk_size=chunk_size,
+            max_in_flight=max_in_flight,
+        )
+
+        if err is not None:
+            return (
+                f"{err} Chunks scored so far are checkpointed; rerun the "
+                "pipeline with the same input to resume."
+            )
+
+        return None
+
+    return predict_file(
+        input_path=f"s3://{bucket}/{input_key}",
+        input_format=input_format,
+        output_path=f"s3://{bucket}/{output_key}",
+        output_format=output_format,
+        endpoint_name=endpoint_name,
+        predictor=predictor,
+    )
+
+
+def predict_file(
+    input_path: str,
+    input_format: FileFormat,
+    output_path: str,
+    output_format: FileFormat,
+    endpoint_name: str,
+    predictor: Predictor,
+) -> str | None:
+    """
+    Score a local or s3 file in memory and write it with its predictions to
+    output_path. Returns an error message, if any.
+    """
+    data, err = read_batch_prediction_data(path=input_path, file_format=input_format)
+
+    if err is not None:
+        return err
+
+    data, err = prepare_batch_prediction_data(uploaded_data=data)
+
+    if err is not None:
+        return err
+
+    logger.info(f"Getting predictions for {input_path}...")
+    request_body = {"Input": data.values.tolist()}
+    predictions = predict_iris(
+        request_body=request_body,
+        endpoint_name=endpoint_name,
+        batch=True,
+        predictor=predictor,
+    )
+
+    data[DataField.PREDICTION] = predictions
+
+    write_tabular_data(data=data, path=output_path, file_format=output_format)
+
+    return None
+
+
 def inference_pipeline(
     session: Session,
+    s3_client: Any,
     deployed_endpoint_name: str,
     input_path_prefix: str,
     inference_file_name: str,
     output_path_prefix: str,
+    input_format: str | None,
+    output_format: str,
+    prediction_backend: str,
+    local_model_path: str | None,
+    stream: bool,
+    chunk_size: int,
+    max_in_flight: int,
 ) -> None:
     logger.info("Inference pipeline has started.")
 
-    input_path = (
-        f"s3://{session.default_bucket()}/{input_path_prefix}/{inference_file_name}"
-    )
-    data = pd.read_csv(
-        filepath_or_buffer=input_path,
-    )
-    data, err = prepare_batch_prediction_data(uploaded_data=data)
+    input_format = input_format or get_file_format(inference_file_name)
+    if input_format is None:
+        logger.error(
+            f"Cannot tell the format of {inference_file_name} from its extension; "
+            f"give one of {[file_format.value for file_format in FileFormat]}."
+        )
+        return None
+
+    predictor = get_predictor(backend=prediction_backend, model_path=local_model_path)
+    timestamp = dt.now().strftime("%Y_%m_%d_%H_%M_%S")
+
+    if prediction_backend == PredictionBackend.LOCAL and os.path.isfile(
+        inference_file_name
+    ):
+        # a file on disk scored by the local backend needs no aws access; its
+        # predictions are written next to it
+        if stream:
+            logger.error("Streaming mode only scores files in the S3 bucket.")
+            return None
+
+        stem = os.path.basename(inference_file_name).split(".")[0]
+        output_path = os.path.join(
+            os.path.dirname(inference_file_name),
+            f"{stem}_predictions_{timestamp}.{output_format}",
+        )
+        err = predict_file(
+            input_path=inference_file_name,
+            input_format=FileFormat(input_format),
+            output_path=output_path,
+            output_format=FileFormat(output_format),
+            endpoint_name=deployed_endpoint_name,
+            predictor=predictor,
+        )
+    else:
+        checkpoint_prefix = None
+        if stream:
+            # checkpoints are kept per model version, so that a rerun after a
+            # redeployment does not mix predictions of two models
+            model_version = _model_version_slug(
+                predictor=predictor, endpoint_name=deployed_endpoint_name
+            )
+            checkpoint_prefix = f"{output_path_prefix}/checkpoints/{model_version}/{inference_file_name.split('.')[0]}"
+
+        bucket = session.default_bucket()
+        output_key = f"{output_path_prefix}/{inference_file_name.split('.')[0]}_predictions_{timestamp}.{output_format}"
+        output_path = f"s3://{bucket}/{output_key}"
+        err = score_inference_file(
+            s3_client=s3_client,
+            bucket=bucket,
+            input_key=f"{input_path_prefix}/{inference_file_name}",
+            input_format=FileFormat(input_format),
+            output_key=output_key,
+            output_format=FileFormat(output_format),
+            checkpoint_prefix=checkpoint_prefix,
+            endpoint_name=deployed_endpoint_name,
+            predictor=predictor,
+            stream=stream,
+            chunk_size=chunk_size,
+            max_in_flight=max_in_flight,
+        )
 
     if err is not None:
         logger.error(err)
         return None
 
-    logger.info("Getting predictions...")
-    request_body = {"Input": data.values.tolist()}
-    predictions = predict_iris(
-        request_body=request_body,
-        endpoint_name=deployed_endpoint_name,
+    if isinstance(predictor, CachingPredictor):
+        logger.info(f"Prediction cache stats: {predictor.cache.stats()}")
+
+    logger.info(
+        "Inference pipeline finished successfully. "
+        f"Predictions are written to {output_path}."
     )
 
-    data[DataField.PREDICTION] = predictions
+    return None
 
-    output_path = f"s3://{session.default_bucket()}/{output_path_prefix}/{inference_file_name.split('.')[0]}_predictions_{dt.now().strftime('%Y_%m_%d_%H_%M_%S')}.csv"
-    data.to_csv(path_or_buf=output_path, index=False)
+
+def prefix_inference_pipeline(
+    session: Session,
+    s3_client: Any,
+    deployed_endpoint_name: str,
+    input_path_prefix: str,
+    output_path_prefix: str,
+    input_format: str | None,
+    output_format: str,
+    prediction_backend: str,
+    local_model_path: str | None,
+    stream: bool,
+    chunk_size: int,
+    max_in_flight: int,
+    max_workers: int,
+) -> None:
+    logger.info("Prefix inference pipeline has started.")
+
+    bucket = session.default_bucket()
+    predictor = get_predictor(backend=prediction_backend, model_path=local_model_path)
+
+    # outputs are grouped by model version so that files already scored by
+    # the current model are skipped and a new model rescores everything
+    model_version = _model_version_slug(
+        predictor=predictor, endpoint_name=deployed_endpoint_name
+    )
+    version_output_prefix = f"{output_path_prefix}/{model_version}"
+
+    # without an explicit format, every file with a known extension is scored
+    input_formats = {
+        obj["Key"]: input_format or get_file_format(obj["Key"])
+        for obj in list_s3_objects(
+            s3_client=s3_client, bucket=bucket, prefix=f"{input_path_prefix}/"
+        )
+    }
+    input_keys = [key for key, file_format in input_formats.items() if file_format]
+    existing_output_keys = {
+        obj["Key"]
+        for obj in list_s3_objects(
+            s3_client=s3_client, bucket=bucket, prefix=f"{version_output_prefix}/"
+        )
+    }
+
+    jobs = {}
+    for input_key in input_keys:
+        stem = input_key.removeprefix(f"{input_path_prefix}/").rsplit(".", 1)[0]
+        output_key = f"{version_output_prefix}/{stem}_predictions.{output_format}"
+
+        if output_key in existing_output_keys:
+            continue
+
+        jobs[input_key] = dict(
+            input_format=FileFormat(input_formats[input_key]),
+            output_key=output_key,
+            output_format=FileFormat(output_format),
+            checkpoint_prefix=f"{version_output_prefix}/checkpoints/{stem}",
+        )
 
     logger.info(
-        "Inference pipeline finished successfully. "
-        f"Predictions are written to {output_path}."
+        f"Found {len(input_keys)} inference files under {input_path_prefix}; "
+        f"{len(input_keys) - len(jobs)} are already scored by model version "
+        f"'{model_version}' and will be skipped."
+    )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            input_key: executor.submit(
+                score_inference_file,
+                s3_client=s3_client,
+                bucket=bucket,
+                input_key=input_key,
+                endpoint_name=deployed_endpoint_name,
+                predictor=predictor,
+                stream=stream,
+                chunk_size=chunk_size,
+                max_in_flight=max_in_flight,
+                **job,
+            )
+            for input_key, job in jobs.items()
+        }
+
+        # a failing file must not stop the others
+        errors = {}
+        for input_key, future in futures.items():
+            try:
+                errors[input_key] = future.result()
+            except Exception as e:
+                errors[input_key] = f"error: {e}"
+
+    for input_key, err in errors.items():
+        if err is not None:
+            logger.error(f"{input_key}: {err}")
+
+    if isinstance(predictor, CachingPredictor):
+        logger.info(f"Prediction cache stats: {predictor.cache.stats()}")
+
+    n_failed = sum(err is not None for err in errors.values())
+    logger.info(
+        f"Prefix inference pipeline finished: {len(jobs) - n_failed} files scored, "
+        f"{n_failed} failed. Predictions are written to "
+        f"s3://{bucket}/{version_output_prefix}."
     )
 
     return None
@@ -1,19 +1,20 @@
 from typing import Any
 
-import pandas as pd
 from sagemaker.session import Session
 
 from steps import (
+    CachingPredictor,
     create_data_drift_baseline,
     create_data_drift_report,
     create_data_monitoring_schedule,
     create_model_drift_report,
     extract_captured_data,
     fetch_model_monitoring_data,
+    get_predictor,
     predict_iris,
 )
 from utils.constants import DataField
-from utils.helper import get_logger
+from utils.helper import get_logger, read_csv_data
 
 logger = get_logger(__name__)
 
@@ -71,6 +72,7 @@ def evidently_data_drift_monitoring_pipeline(
     endpoint_name: str,
     evidently_api_token: str,
     evidently_propject_id: str,
+    max_workers: int,
 ) -> None:
     logger.info(
         f"Starting data drift monitoring pipeline for the endpoint {endpoint_name}..."
@@ -82,6 +84,7 @@ def evidently_data_drift_monitoring_pipeline(
         s3_bucket_name=s3_bucket_name,
         data_capture_prefix=data_capture_prefix,
         endpoint_name=endpoint_name,
+        max_workers=max_workers,
     )
 
     if err is not None:
@@ -89,8 +92,8 @@ def evidently_data_drift_monitoring_pipeline(
         return None
 
     logger.info("Fetching baseline data for data monitoring...")
-    baseline_data = pd.read_csv(
-        filepath_or_buffer=baseline_data_s3_uri,
+    baseline_data = read_csv_data(
+        path=baseline_data_s3_uri, columns=(*DataField.FEATURES, DataField.TARGET)
     )
 
     # check if "target" is in the colums; if so, remove it as it is not needed here
@@ -129,6 +132,8 @@ def evidently_model_drift_monitoring_pipeline(
     endpoint_name: str,
     evidently_api_token: str,
     evidently_propject_id: str,
+    prediction_backend: str,
+    local_model_path: str | None,
 ) -> None:
     logger.info(
         f"Starting model drift monitoring pipeline for the endpoint {endpoint_name}..."
@@ -155,12 +160,18 @@ def evidently_model_drift_monitoring_pipeline(
     request_body = {
         "Input": baseline_data.drop([DataField.TARGET], axis=1).values.tolist()
     }
+    predictor = get_predictor(backend=prediction_backend, model_path=local_model_path)
     predictions = predict_iris(
         request_body=request_body,
         endpoint_name=endpoint_name,
+        batch=True,
+        predictor=predictor,
     )
     baseline_data[DataField.PREDICTION] = predictions
 
+    if isinstance(predictor, CachingPredictor):
+        logger.info(f"Prediction cache stats: {predictor.cache.stats()}")
+
     logger.info("Creating model drift report...")
     create_model_drift_report(
         evidently_api_token=evidently_api_token,
@@ -1,7 +1,10 @@
+from typing import Any
+
 from sagemaker.workflow.pipeline import Pipeline
 from sagemaker.session import Session
 
 from steps import (
+    fetch_model,
     model_trainer,
     model_evaluator,
     model_registerer,
@@ -16,23 +19,54 @@ def training_pipeline(
     pipeline_name: str,
     session: Session,
     role: str,
+    sm_client: Any,
     s3_bucket_name: str,
     project_s3_prefix: str,
     output_path: str,
     code_location: str,
     train_data_uri: str,
     test_data_uri: str,
+    incremental_train_data_uri: str,
     hyperparameters: dict,
+    evaluation_arguments: dict,
     framework_version: str,
     instance_type: str,
     instance_count: int,
     model_package_group_name: str,
     model_approval_status: str,
     register_accuracy_threshold: float,
+    register_latency_budget_ms: float | None,
+    register_model_size_budget_mb: float | None,
+    incremental: bool = False,
 ) -> None:
 
     logger.info("Starting training pipeline...")
 
+    base_model_uri = None
+    base_model_version = None
+    if incremental:
+        # continue from the latest approved model, the one that gets deployed
+        latest_model = fetch_model(
+            role=role,
+            session=session,
+            sm_client=sm_client,
+            model_package_group_name=model_package_group_name,
+        )
+        base_model_uri = latest_model.model_description["InferenceSpecification"][
+            "Containers"
+        ][0]["ModelDataUrl"]
+        base_model_version = str(latest_model.version_number)
+        train_data_uri = incremental_train_data_uri
+        hyperparameters = {
+            **hyperparameters,
+            "train": incremental_train_data_uri,
+            "base-model-version": base_model_version,
+        }
+        logger.info(
+            f"Incremental training from model version {base_model_version} "
+            f"on {incremental_train_data_uri}."
+        )
+
     sklearn_estimator, model_training_step = model_trainer(
         role=role,
         sagemaker_session=session,
@@ -43,6 +77,7 @@ def training_pipeline(
         instance_count=instance_count,
         output_path=output_path,
         code_location=code_location,
+        base_model_uri=base_model_uri,
     )
 
     evaluation_report, model_evaluation_step = model_evaluator(
@@ -56,6 +91,7 @@ def training_pipeline(
         model_training_step=model_training_step,
         test_data_uri=test_data_uri,
         code_location=code_location,
+        evaluation_arguments=evaluation_arguments,
     )
 
     model_registering_step = model_registerer(
@@ -64,6 +100,7 @@ def training_pipeline(
         estimator=sklearn_estimator,
         model_package_group_name=model_package_group_name,
         model_approval_status=model_approval_status,
+        base_model_version=base_model_version,
     )
 
     model_registering_condition_step = model_registry_condition(
@@ -71,6 +108,8 @@ def training_pipeline(
         evaluation_report=evaluation_report,
         model_registering_step=model_registering_step,
         register_accuracy_threshold=register_accuracy_threshold,
+        register_latency_budget_ms=register_latency_budget_ms,
+        register_model_size_budget_mb=register_model_size_budget_mb,
     )
 
     pipeline = Pipeline(
@@ -86,8 +125,18 @@ def training_pipeline(
 
     # Submit pipline
     pipeline.upsert(role_arn=role)
-    pipeline.start()
+    execution = pipeline.start()
 
     logger.info("Training pipeline submitted to sagemaker for execution.")
 
+    # the training profile ships inside the model artifact and the evaluation
+    # profile is written next to evaluation.json (see steps/evaluator.py)
+    execution_id = execution.arn.split("/")[-1]
+    logger.info(
+        "Profiling reports of this run: profile.json in the model.tar.gz of the "
+        f"training job under {output_path}, and "
+        f"s3://{s3_bucket_name}/{project_s3_prefix}/evaluation_report/"
+        f"{execution_id}/profile.json."
+    )
+
     return None
@@ -0,0 +1,31 @@
+import time
+
+import numpy as np
+
+
+def benchmark_latency(predict, X, batch_sizes, n_repeats):
+    """
+    Latency percentiles in milliseconds and throughput of predict per batch size.
+    """
+    rows = np.resize(np.asarray(X), (max(batch_sizes), np.shape(X)[1]))
+
+    results = {}
+    for batch_size in batch_sizes:
+        batch = rows[:batch_size]
+        predict(batch)
+
+        latencies = np.empty(n_repeats)
+        for i in range(n_repeats):
+            start = time.perf_counter()
+            predict(batch)
+            latencies[i] = time.perf_counter() - start
+
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+        results[f"batch_{batch_size}"] = {
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "rows_per_second": float(batch_size * n_repeats / latencies.sum()),
+        }
+
+    return results
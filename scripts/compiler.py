@@ -0,0 +1,250 @@
+import json
+import os
+
+import numpy as np
+
+ARRAY_NAMES = ("feature", "threshold", "children", "value", "missing_left")
+# above this many rows times trees, a batch is scored faster by sklearn's
+# compiled tree code, despite its per-call overhead
+MAX_COMPILED_BATCH_NODES = 20_000
+
+
+class CompiledTrees:
+    """
+    Boosted tree pipeline flattened into numpy node arrays; large batches are
+    scored by the pipeline at fallback_path, if given.
+    """
+
+    def __init__(self, meta, arrays, fallback_path=None):
+        self.meta = meta
+        self.fallback_path = fallback_path
+        self._fallback = None
+        self.classes_ = np.asarray(meta["classes"])
+        self.roots = np.asarray(meta["roots"], dtype=np.int64)
+        # one-hot map of every tree to the class whose raw score it adds to
+        self.tree_classes = np.eye(max(1, len(meta["init_raw"])))[meta["tree_class"]]
+        self.init_raw = np.asarray(meta["init_raw"], dtype=np.float64)
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+
+        preprocessing = meta.get("preprocessing")
+        if preprocessing is not None:
+            self.fill = np.asarray(preprocessing["fill"])
+            self.mean = np.asarray(preprocessing["mean"])
+            self.scale = np.asarray(preprocessing["scale"])
+
+    def predict(self, X):
+        if self.fallback_path is not None and (
+            len(X) * self.roots.size > MAX_COMPILED_BATCH_NODES
+        ):
+            return self.fallback.predict(X)
+
+        raw = self.decision_function(X)
+        if raw.shape[1] == 1:  # binary: raw is the log-odds of the second class
+            return self.classes_[(raw[:, 0] > 0).astype(np.intp)]
+
+        return self.classes_[np.argmax(raw, axis=1)]
+
+    def decision_function(self, X):
+        X = self._preprocess(X)
+        n_rows = X.shape[0]
+
+        # feature f of row i is at f * n_rows + i of the column-major values
+        X_flat = X.T.ravel()
+        rows = np.arange(n_rows)[:, None]
+        has_missing = np.isnan(X_flat).any()
+
+        # every tree is walked one level per step; the right and left children
+        # of node i are at 2 * i and 2 * i + 1, and leaves are their own children
+        node = np.broadcast_to(self.roots, (n_rows, self.roots.size)).copy()
+        for _ in range(self.meta["max_depth"]):
+            x = X_flat[self.feature[node] * n_rows + rows]
+            go_left = x <= self.threshold[node]
+            if has_missing:
+                go_left |= np.isnan(x) & self.missing_left[node]
+            node = self.children[2 * node + go_left]
+
+        return (
+            self.init_raw + (self.value[node] * self.meta["scale"]) @ self.tree_classes
+        )
+
+    @property
+    def fallback(self):
+        if self._fallback is None:
+            import joblib
+
+            self._fallback = joblib.load(self.fallback_path)
+        return self._fallback
+
+    def warm_up(self, X):
+        self.decision_function(X)
+        if self.fallback_path is not None:
+            self.fallback.predict(X)
+
+    def _preprocess(self, X):
+        X = np.array(X)  # copy, like sklearn's transformers
+        if not np.issubdtype(X.dtype, np.floating):
+            X = X.astype(np.float64)
+        if X.ndim != 2 or X.shape[1] != self.meta["n_features"]:
+            raise ValueError(
+                f"Expected {self.meta['n_features']} features per row, "
+                f"got an array of shape {X.shape}."
+            )
+
+        if self.meta.get("preprocessing") is not None:
+            # same in-place operations, so the same rounding, as SimpleImputer
+            # and StandardScaler
+            missing = np.isnan(X)
+            X[missing] = np.broadcast_to(self.fill, X.shape)[missing]
+            X -= self.mean
+            X /= self.scale
+
+        # sklearn trees compare float32 inputs; histogram boosting float64
+        return X.astype(self.meta["input_dtype"])
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(self.meta, f)
+
+    @classmethod
+    def load(cls, path, fallback_path=None):
+        # memory-mapped, so loading does not read the node arrays up front
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in ARRAY_NAMES
+        }
+        return cls(meta=meta, arrays=arrays, fallback_path=fallback_path)
+
+
+def compile_model(model):
+    """
+    Compile a fitted gbm or hist pipeline; returns None for any other model.
+    """
+    from sklearn.ensemble import (
+        GradientBoostingClassifier,
+        HistGradientBoostingClassifier,
+    )
+    from sklearn.impute import SimpleImputer
+    from sklearn.preprocessing import StandardScaler
+
+    classifier = model[-1]
+    steps = [step for _, step in model.steps[:-1]]
+
+    preprocessing = None
+    if len(steps) == 2:
+        imputer, scaler = steps
+        if not (
+            isinstance(imputer, SimpleImputer)
+            and imputer.strategy == "mean"
+            and isinstance(scaler, StandardScaler)
+            and scaler.with_mean
+            and scaler.with_std
+            and len(imputer.statistics_) == scaler.n_features_in_
+        ):
+            return None
+        preprocessing = dict(
+            fill=imputer.statistics_.tolist(),
+            mean=scaler.mean_.tolist(),
+            scale=scaler.scale_.tolist(),
+        )
+    elif steps:
+        return None
+
+    if isinstance(classifier, GradientBoostingClassifier):
+        trees = _gbm_trees(classifier)
+        init_raw = classifier._raw_predict_init(
+            np.zeros((1, classifier.n_features_in_), dtype=np.float32)
+        )[0]
+        scale = classifier.learning_rate
+        input_dtype = "float32"
+    elif isinstance(classifier, HistGradientBoostingClassifier):
+        if classifier.is_categorical_ is not None:
+            return None
+        trees = _hist_trees(classifier)
+        init_raw = np.ravel(classifier._baseline_prediction)
+        scale = 1.0  # leaf values already include the learning rate
+        input_dtype = "float64"
+    else:
+        return None
+
+    arrays = {name: [] for name in ARRAY_NAMES}
+    roots, tree_class, max_depth, offset = [], [], 0, 0
+    for tree, k, depth in trees:
+        roots.append(offset)
+        tree_class.append(k)
+        max_depth = max(max_depth, depth)
+
+        node = np.arange(offset, offset + len(tree["feature"]))
+        is_leaf = tree["left"] == -1
+        left = np.where(is_leaf, node, tree["left"] + offset)
+        right = np.where(is_leaf, node, tree["right"] + offset)
+        arrays["children"].append(np.stack([right, left], axis=1).ravel())
+        arrays["feature"].append(np.where(is_leaf, 0, tree["feature"]))
+        for name in ("threshold", "value", "missing_left"):
+            arrays[name].append(tree[name])
+        offset += len(node)
+
+    arrays = dict(
+        feature=np.concatenate(arrays["feature"]).astype(np.int64),
+        threshold=np.concatenate(arrays["threshold"]).astype(np.float64),
+        children=np.concatenate(arrays["children"]).astype(np.int64),
+        value=np.concatenate(arrays["value"]).astype(np.float64),
+        missing_left=np.concatenate(arrays["missing_left"]).astype(bool),
+    )
+    meta = dict(
+        classes=classifier.classes_.tolist(),
+        n_features=int(classifier.n_features_in_),
+        roots=roots,
+        tree_class=tree_class,
+        max_depth=int(max_depth),
+        init_raw=np.asarray(init_raw, dtype=np.float64).tolist(),
+        scale=float(scale),
+        input_dtype=input_dtype,
+        preprocessing=preprocessing,
+    )
+
+    return CompiledTrees(meta=meta, arrays=arrays)
+
+
+def _gbm_trees(classifier):
+    for stage in classifier.estimators_:
+        for k, estimator in enumerate(stage):
+            tree = estimator.tree_
+            yield (
+                dict(
+                    feature=tree.feature,
+                    threshold=tree.threshold,
+                    left=tree.children_left,
+                    right=tree.children_right,
+                    value=tree.value[:, 0, 0],
+                    # sklearn trees do not see missing values here; the
+                    # imputer has filled them
+                    missing_left=np.zeros(tree.node_count, dtype=bool),
+                ),
+                k,
+                tree.max_depth,
+            )
+
+
+def _hist_trees(classifier):
+    for predictors in classifier._predictors:
+        for k, predictor in enumerate(predictors):
+            nodes = predictor.nodes
+            is_leaf = nodes["is_leaf"].astype(bool)
+            yield (
+                dict(
+                    feature=nodes["feature_idx"],
+                    threshold=nodes["num_threshold"],
+                    left=np.where(is_leaf, -1, nodes["left"]),
+                    right=np.where(is_leaf, -1, nodes["right"]),
+                    value=nodes["value"],
+                    missing_left=nodes["missing_go_to_left"],
+                ),
+                k,
+                int(nodes["depth"].max()),
+            )
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+# mirrors utils.constants.DataField; scripts run in sagemaker containers
+# without the rest of the project, which reads its csv files through here
+FEATURES = (
+    "sepal length (cm)",
+    "sepal width (cm)",
+    "petal length (cm)",
+    "petal width (cm)",
+)
+TARGET = "target"
+PREDICTION = "prediction"
+FEATURE_DTYPE = "float32"
+LABEL_DTYPE = "int8"  # target and prediction classes
+DTYPES = {**{feature: FEATURE_DTYPE for feature in FEATURES}, TARGET: LABEL_DTYPE}
+
+
+def read_csv(path, columns, chunksize=None):
+    """
+    Read a csv whose header must be exactly columns, with typed columns.
+    """
+    header = tuple(pd.read_csv(path, nrows=0).columns)
+    if header != tuple(columns):
+        raise ValueError(
+            "Column names are invalid or not ordered correctly. "
+            f"Column names must be and ordered as {tuple(columns)}."
+        )
+
+    dtype = {
+        column: FEATURE_DTYPE if column in FEATURES else LABEL_DTYPE
+        for column in columns
+    }
+
+    # pyarrow does not support chunked reads
+    if chunksize is None:
+        try:
+            return pd.read_csv(path, dtype=dtype, engine="pyarrow")
+        except ImportError:
+            pass
+
+    return pd.read_csv(path, dtype=dtype, engine="c", chunksize=chunksize)
+
+
+def read_dataset(path):
+    """
+    Read a csv of features and target with read_csv.
+    """
+    return read_csv(path=path, columns=(*FEATURES, TARGET))
+
+
+def iter_dataset(path, chunk_rows):
+    """
+    Read a csv of features and target with read_csv, in chunks of chunk_rows
+    rows.
+    """
+    return read_csv(path=path, columns=(*FEATURES, TARGET), chunksize=chunk_rows)
+
+
+def sample_dataset(path, chunk_rows, memory_budget_mb, random_state=42):
+    """
+    Uniform random sample of as many rows as fit in memory_budget_mb, and the
+    number of rows read.
+    """
+    # typed columns plus the float64 sampling key
+    row_bytes = sum(np.dtype(dtype).itemsize for dtype in DTYPES.values()) + 8
+    max_rows = int(memory_budget_mb * 2**20 // row_bytes)
+    rng = np.random.default_rng(random_state)
+
+    sample = pd.DataFrame()
+    n_rows = 0
+    for chunk in iter_dataset(path=path, chunk_rows=chunk_rows):
+        n_rows += len(chunk)
+        chunk["_key"] = rng.random(len(chunk))
+        sample = pd.concat([sample, chunk], ignore_index=True)
+        if len(sample) > max_rows:
+            sample = sample.nsmallest(max_rows, "_key")
+
+    return sample.drop(columns="_key").reset_index(drop=True), n_rows
@@ -1,17 +1,17 @@
+import argparse
 import json
 import logging
+import os
 import pathlib
 import tarfile
 
 import joblib
-import pandas as pd
-from sklearn.metrics import (
-    accuracy_score,
-    confusion_matrix,
-    f1_score,
-    precision_score,
-    recall_score,
-)
+import numpy as np
+from benchmark import benchmark_latency
+from dataio import TARGET, iter_dataset
+from metrics import bootstrap_metrics, classification_metrics, confusion_counts
+from profiler import Profile
+from train import model_fn, predict_fn
 from sklearn.pipeline import Pipeline
 
 logger = logging.getLogger()
@@ -20,6 +20,17 @@ logger.addHandler(logging.StreamHandler())
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    # 0 skips the bootstrap; standard deviations are then reported as NaN
+    parser.add_argument("--bootstrap-resamples", type=int, default=1000)
+    parser.add_argument("--confidence-level", type=float, default=0.95)
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--benchmark-batch-sizes", type=str, default="1 32 1024")
+    parser.add_argument("--benchmark-repeats", type=int, default=100)
+    args, _ = parser.parse_known_args()
+
+    profile = Profile()
+
     model_path = "/opt/ml/processing/model/model.tar.gz"
     with tarfile.open(model_path) as tar:
         # tar.extractall(path="..")
@@ -27,58 +38,99 @@ if __name__ == "__main__":
 
     logger.info("Loading model.")
     # model: Pipeline = joblib.load("model.joblib")
-    model: Pipeline = joblib.load("/opt/ml/processing/model/model.joblib")
+    with profile.timer("model_load"):
+        model: Pipeline = joblib.load("/opt/ml/processing/model/model.joblib")
+
+    classes = model.classes_
+    conf_matrix = np.zeros((len(classes), len(classes)), dtype=np.int64)
+    n_rows = 0
+    # single-row latency is always benchmarked, as the registration latency
+    # budget is checked against it
+    batch_sizes = sorted(
+        {1, *(int(size) for size in args.benchmark_batch_sizes.split())}
+    )
+    benchmark_rows = None
 
-    logger.info("Loading test input data.")
+    # score the test data chunk by chunk, so that memory stays flat however
+    # large the holdout set is; only the confusion matrix is kept
+    logger.info("Performing predictions against test data in chunks.")
     test_path = "/opt/ml/processing/test/test.csv"
-    df = pd.read_csv(test_path, index_col=False)
+    chunks = iter_dataset(path=test_path, chunk_rows=args.chunk_rows)
+    while True:
+        with profile.timer("data_load"):
+            df = next(chunks, None)
+        if df is None:
+            break
 
-    logger.info("Reading test data.")
-    y_test = df["target"].values
-    X_test = df.drop(["target"], axis=1)
+        with profile.timer("prediction"):
+            predictions = model.predict(df.drop(columns=[TARGET]))
+        conf_matrix += confusion_counts(
+            y_true=df[TARGET].values, y_pred=predictions, classes=classes
+        )
+        n_rows += len(df)
+        if benchmark_rows is None:
+            benchmark_rows = df.drop(columns=[TARGET]).values[: max(batch_sizes)]
 
-    logger.info("Performing predictions against test data.")
-    predictions = model.predict(X_test)
-    prediction_probabilities = model.predict_proba(X_test)
+    # benchmark the model the way the endpoint serves it, through the
+    # entry point's model_fn and predict_fn
+    logger.info(f"Benchmarking serving latency at batch sizes {batch_sizes}.")
+    model_dir = "/opt/ml/processing/model"
+    with profile.timer("serving_model_load"):
+        serving_model = model_fn(model_dir)
+    with profile.timer("benchmark"):
+        latency = benchmark_latency(
+            predict=lambda batch: predict_fn(batch, serving_model),
+            X=np.ascontiguousarray(benchmark_rows, dtype=np.float32),
+            batch_sizes=batch_sizes,
+            n_repeats=args.benchmark_repeats,
+        )
+    serving_metrics = {
+        "model_type": type(serving_model).__name__,
+        "model_archive_size_bytes": os.path.getsize(model_path),
+        "model_load_seconds": profile.timings["serving_model_load_seconds"],
+        "latency": latency,
+    }
+    logger.info(f"Serving metrics: {serving_metrics}")
 
-    precision = precision_score(y_test, predictions, average="weighted")
-    recall = recall_score(y_test, predictions, average="weighted")
-    f1_sc = f1_score(y_test, predictions, average="weighted")
-    accuracy = accuracy_score(y_test, predictions)
-    conf_matrix = confusion_matrix(y_test, predictions)
+    metrics = {
+        name: {"value": float(value), "standard_deviation": "NaN"}
+        for name, value in classification_metrics(conf_matrix).items()
+    }
+    if args.bootstrap_resamples > 0:
+        with profile.timer("bootstrap"):
+            intervals = bootstrap_metrics(
+                conf_matrix,
+                n_resamples=args.bootstrap_resamples,
+                confidence_level=args.confidence_level,
+            )
+        for name, interval in intervals.items():
+            metrics[name].update(interval)
+    accuracy, precision, recall, f1_sc = (
+        metrics[name]["value"] for name in ("accuracy", "precision", "recall", "f1")
+    )
 
     logger.info(f"Accuracy: {accuracy}")
     logger.info(f"Precision: {precision}")
     logger.info(f"Recall: {recall}")
     logger.info(f"F1-score: {f1_sc}")
     logger.info(f"Confusion matrix: {conf_matrix}")
+    if args.bootstrap_resamples > 0:
+        logger.info(f"Bootstrap over {args.bootstrap_resamples} resamples: {intervals}")
 
     # Available metrics to add to model:
     # https://docs.aws.amazon.com/sagemaker/latest/dg/model-monitor-model-quality-metrics.html
     report_dict = {
         "binary_classification_metrics": {
-            "accuracy": {"value": accuracy, "standard_deviation": "NaN"},
-            "precision": {"value": precision, "standard_deviation": "NaN"},
-            "recall": {"value": recall, "standard_deviation": "NaN"},
-            "f1": {"value": f1_sc, "standard_deviation": "NaN"},
+            **metrics,
             "confusion_matrix": {
-                "0": {
-                    "0": int(conf_matrix[0][0]),
-                    "1": int(conf_matrix[0][1]),
-                    "2": int(conf_matrix[0][2]),
-                },
-                "1": {
-                    "0": int(conf_matrix[1][0]),
-                    "1": int(conf_matrix[1][1]),
-                    "2": int(conf_matrix[1][2]),
-                },
-                "2": {
-                    "0": int(conf_matrix[2][0]),
-                    "1": int(conf_matrix[2][1]),
-                    "2": int(conf_matrix[2][2]),
-                },
+                str(true_class): {
+                    str(predicted_class): int(count)
+                    for predicted_class, count in zip(classes, row)
+                }
+                for true_class, row in zip(classes, conf_matrix)
             },
         },
+        "serving_metrics": serving_metrics,
     }
 
     output_dir = "/opt/ml/processing/evaluation"
@@ -87,3 +139,12 @@ if __name__ == "__main__":
     evaluation_path = f"{output_dir}/evaluation.json"
     with open(evaluation_path, "w") as f:
         f.write(json.dumps(report_dict))
+
+    profile.record(
+        n_rows=n_rows,
+        rows_per_second=n_rows / profile.timings["prediction_seconds"],
+        model_joblib_size_bytes=os.path.getsize(
+            "/opt/ml/processing/model/model.joblib"
+        ),
+    )
+    profile.write(f"{output_dir}/profile.json")
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
+from sklearn.linear_model import SGDClassifier
+
+ENGINES = {
+    GradientBoostingClassifier: "gbm",
+    HistGradientBoostingClassifier: "hist",
+    SGDClassifier: "sgd",
+}
+
+
+def continue_training(model, X, y, n_estimators):
+    """
+    Train the classifier of a fitted pipeline further on new data; returns the
+    classes that the new data has no rows of.
+    """
+    # the preprocessing steps stay as fitted on the data the base model was
+    # trained on; only the classifier is trained further
+    classifier = model[-1]
+
+    # a warm-started hist model bins the new data again, and the thresholds of
+    # its existing trees no longer match the bins the new trees are fitted to
+    if isinstance(classifier, HistGradientBoostingClassifier):
+        raise ValueError(
+            "Histogram-based (hist) models cannot be trained incrementally on "
+            "new data; train from scratch instead."
+        )
+
+    # sklearn encodes the labels again on every fit, so the new data must
+    # not bring classes the base model does not know
+    new_labels = np.setdiff1d(np.unique(y), classifier.classes_)
+    if new_labels.size:
+        raise ValueError(
+            f"Labels {new_labels.tolist()} of the incremental data are not among "
+            f"the classes {classifier.classes_.tolist()} of the base model; "
+            "train from scratch to add classes."
+        )
+
+    X_new = np.asarray(model[:-1].transform(X) if len(model) > 1 else X)
+
+    if isinstance(classifier, SGDClassifier):
+        # linear models just take more partial_fit steps
+        classifier.partial_fit(X_new, y)
+        return np.setdiff1d(classifier.classes_, np.unique(y))
+
+    sample_weight = None
+    missing_labels = np.setdiff1d(classifier.classes_, np.unique(y))
+    if missing_labels.size:
+        # boosting cannot continue on a subset of the classes; rows with zero
+        # weight keep them all without affecting the new trees
+        X_new = np.concatenate(
+            [X_new, np.repeat(X_new[:1], missing_labels.size, axis=0)]
+        )
+        y = pd.concat(
+            [y, pd.Series(missing_labels, dtype=y.dtype, name=y.name)],
+            ignore_index=True,
+        )
+        sample_weight = np.r_[np.ones(len(X)), np.zeros(missing_labels.size)]
+
+    classifier.set_params(
+        warm_start=True, n_estimators=classifier.n_estimators_ + n_estimators
+    )
+    classifier.fit(X_new, y, sample_weight=sample_weight)
+    classifier.set_params(warm_start=False)
+
+    return missing_labels
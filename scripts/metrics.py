@@ -0,0 +1,74 @@
+import numpy as np
+
+
+def confusion_counts(y_true, y_pred, classes):
+    """
+    Confusion matrix over the sorted classes, with true classes on the first axis.
+    """
+    true_index = np.searchsorted(classes, y_true)
+    pred_index = np.searchsorted(classes, y_pred)
+    unknown = (true_index == len(classes)) | (
+        classes[np.minimum(true_index, len(classes) - 1)] != y_true
+    )
+    if unknown.any():
+        raise ValueError(
+            f"Labels {np.unique(y_true[unknown]).tolist()} are not among the "
+            f"model classes {classes.tolist()}."
+        )
+
+    counts = np.bincount(
+        true_index * len(classes) + pred_index, minlength=len(classes) ** 2
+    )
+    return counts.reshape(len(classes), len(classes))
+
+
+def classification_metrics(confusion):
+    """
+    Accuracy and sklearn's weighted precision, recall and F1 of confusion matrices.
+    """
+    confusion = np.asarray(confusion, dtype=np.float64)
+    tp = np.diagonal(confusion, axis1=-2, axis2=-1)
+    support = confusion.sum(axis=-1)
+    predicted = confusion.sum(axis=-2)
+    n = support.sum(axis=-1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, tp / predicted, 0.0)
+        recall = np.where(support > 0, tp / support, 0.0)
+        f1 = np.where(support + predicted > 0, 2 * tp / (support + predicted), 0.0)
+
+    weights = support / n[..., None]
+
+    return {
+        "accuracy": tp.sum(axis=-1) / n,
+        "precision": (weights * precision).sum(axis=-1),
+        "recall": (weights * recall).sum(axis=-1),
+        "f1": (weights * f1).sum(axis=-1),
+    }
+
+
+def bootstrap_metrics(confusion, n_resamples, confidence_level=0.95, random_state=42):
+    """
+    Bootstrap standard deviations and confidence intervals of the metrics.
+    """
+    confusion = np.asarray(confusion, dtype=np.int64)
+    n = int(confusion.sum())
+    rng = np.random.default_rng(random_state)
+
+    # resampling rows with replacement draws the cell counts of the confusion
+    # matrix from a multinomial, whatever the number of rows
+    resampled = rng.multinomial(n, confusion.ravel() / n, size=n_resamples)
+    metrics = classification_metrics(resampled.reshape(n_resamples, *confusion.shape))
+
+    alpha = (1 - confidence_level) / 2
+    return {
+        name: {
+            "standard_deviation": float(np.std(values, ddof=1)),
+            "confidence_interval": {
+                "level": confidence_level,
+                "lower": float(np.quantile(values, alpha)),
+                "upper": float(np.quantile(values, 1 - alpha)),
+            },
+        }
+        for name, values in metrics.items()
+    }
@@ -0,0 +1,42 @@
+import numpy as np
+from dataio import FEATURES, TARGET, iter_dataset
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+
+def fit_out_of_core(path, chunk_rows, epochs, random_state=42):
+    """
+    Fit a scaler and a linear classifier on a csv streamed in chunks; returns
+    the pipeline and the number of rows.
+    """
+    scaler = StandardScaler()
+    classes = set()
+    n_rows = 0
+    for chunk in iter_dataset(path=path, chunk_rows=chunk_rows):
+        scaler.partial_fit(chunk[list(FEATURES)])
+        classes.update(chunk[TARGET].unique().tolist())
+        n_rows += len(chunk)
+
+    # missing values are imputed with the feature mean, which is 0 once scaled
+    imputer = SimpleImputer(strategy="constant", fill_value=0.0)
+    imputer.fit(np.zeros((1, len(FEATURES)), dtype=np.float32))
+
+    classifier = SGDClassifier(loss="log_loss", random_state=random_state)
+    rng = np.random.default_rng(random_state)
+    for _ in range(epochs):
+        for chunk in iter_dataset(path=path, chunk_rows=chunk_rows):
+            # shuffle within the chunk; sgd converges poorly on sorted rows
+            chunk = chunk.iloc[rng.permutation(len(chunk))]
+            classifier.partial_fit(
+                imputer.transform(scaler.transform(chunk[list(FEATURES)])),
+                chunk[TARGET],
+                classes=np.array(sorted(classes)),
+            )
+
+    pipeline = Pipeline(
+        [("scaler", scaler), ("imputer", imputer), ("classifier", classifier)]
+    )
+
+    return pipeline, n_rows
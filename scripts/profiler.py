@@ -0,0 +1,67 @@
+import json
+import resource
+import time
+from contextlib import contextmanager
+
+
+class Profile:
+    """
+    Collect timings and metrics of a training or evaluation job and write
+    them as a json report.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.metrics = {}
+
+    @contextmanager
+    def timer(self, name):
+        # timings of the same name add up, e.g. over the chunks of a dataset
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            key = f"{name}_seconds"
+            self.timings[key] = self.timings.get(key, 0.0) + (
+                time.perf_counter() - start
+            )
+
+    def record(self, **metrics):
+        self.metrics.update(metrics)
+
+    def write(self, path):
+        report = {
+            **self.metrics,
+            "timings": self.timings,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+        return report
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on linux; children covers the joblib workers
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(self_rss, children_rss) / 1024
+
+
+def search_candidates(search):
+    """
+    Per-candidate mean fit and score times and test score of a fitted
+    hyperparameter search, from its cv_results_.
+    """
+    results = search.cv_results_
+    keys = ["mean_fit_time", "std_fit_time", "mean_score_time", "mean_test_score"]
+    if "iter" in results:  # successive halving rounds
+        keys += ["iter", "n_resources"]
+
+    return [
+        {
+            "params": params,
+            **{key: results[key][i].item() for key in keys},
+        }
+        for i, params in enumerate(results["params"])
+    ]
@@ -0,0 +1,122 @@
+import time
+
+import numpy as np
+from joblib import effective_n_jobs
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (
+    GridSearchCV,
+    HalvingGridSearchCV,
+    ParameterGrid,
+    ParameterSampler,
+)
+from sklearn.model_selection._search import BaseSearchCV
+
+SEARCH_STRATEGIES = ("grid", "halving", "random")
+
+
+class TimeBudgetedRandomSearchCV(BaseSearchCV):
+    """
+    Randomized search that stops after the batch that exceeds time_budget.
+    """
+
+    def __init__(
+        self,
+        estimator,
+        param_distributions,
+        *,
+        time_budget,
+        n_iter=10,
+        batch_size=1,
+        random_state=None,
+        scoring=None,
+        n_jobs=None,
+        refit=True,
+        cv=None,
+        verbose=0,
+        pre_dispatch="2*n_jobs",
+        error_score=np.nan,
+        return_train_score=False,
+    ):
+        self.param_distributions = param_distributions
+        self.time_budget = time_budget
+        self.n_iter = n_iter
+        self.batch_size = batch_size
+        self.random_state = random_state
+        super().__init__(
+            estimator=estimator,
+            scoring=scoring,
+            n_jobs=n_jobs,
+            refit=refit,
+            cv=cv,
+            verbose=verbose,
+            pre_dispatch=pre_dispatch,
+            error_score=error_score,
+            return_train_score=return_train_score,
+        )
+
+    def _run_search(self, evaluate_candidates):
+        candidates = list(
+            ParameterSampler(
+                self.param_distributions,
+                n_iter=self.n_iter,
+                random_state=self.random_state,
+            )
+        )
+        deadline = time.monotonic() + self.time_budget
+
+        for start in range(0, len(candidates), self.batch_size):
+            evaluate_candidates(candidates[start : start + self.batch_size])
+            if time.monotonic() >= deadline:
+                break
+
+
+def build_search(strategy, pipeline, param_grid, n_jobs, time_budget, cv=3):
+    if strategy == "grid":
+        return GridSearchCV(
+            estimator=pipeline,
+            param_grid=param_grid,
+            scoring="accuracy",
+            cv=cv,
+            refit=True,
+            n_jobs=n_jobs,
+        )
+
+    if strategy == "halving":
+        # every round keeps the best third of the candidates and triples the
+        # number of training samples they are fitted on
+        return HalvingGridSearchCV(
+            estimator=pipeline,
+            param_grid=param_grid,
+            scoring="accuracy",
+            cv=cv,
+            factor=3,
+            refit=True,
+            n_jobs=n_jobs,
+            random_state=42,
+        )
+
+    if strategy == "random":
+        n_candidates = len(ParameterGrid(param_grid))
+        return TimeBudgetedRandomSearchCV(
+            estimator=pipeline,
+            param_distributions=param_grid,
+            time_budget=time_budget,
+            n_iter=n_candidates,  # the whole grid, in random order
+            batch_size=effective_n_jobs(n_jobs),
+            random_state=42,
+            scoring="accuracy",
+            cv=cv,
+            refit=True,
+            n_jobs=n_jobs,
+        )
+
+    raise ValueError(
+        f"Unknown search strategy '{strategy}'; "
+        f"must be one of {', '.join(SEARCH_STRATEGIES)}."
+    )
+
+
+def count_fits(search):
+    # cv_results_ has a row per evaluated candidate (per round for halving)
+    n_fits = len(search.cv_results_["params"]) * search.n_splits_
+    return n_fits + int(bool(search.refit))
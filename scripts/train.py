@@ -1,15 +1,24 @@
 import argparse
+import gzip
+import io
 import json
 import logging
 import os
+import tarfile
+import tempfile
+import time
 
 import joblib
-import pandas as pd
-from sklearn.ensemble import GradientBoostingClassifier
-from sklearn.impute import SimpleImputer
-from sklearn.model_selection import GridSearchCV
-from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import StandardScaler
+import numpy as np
+
+# mirrors dataio; kept here so that serving does not import pandas
+N_FEATURES = 4
+FEATURE_DTYPE = "float32"
+
+# requests of this content type are answered with the model load and warm-up
+# durations instead of predictions, as a readiness check
+READINESS_CONTENT_TYPE = "application/vnd.readiness+json"
+READINESS = {}
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -22,6 +31,17 @@ if __name__ == "__main__":
     parser.add_argument("--n-estimators", type=str, default="100 200 300")
     parser.add_argument("--learning-rate", type=str, default="0.1 0.01")
     parser.add_argument("--max-depth", type=str, default="2 4 6")
+    parser.add_argument("--engine", type=str, default="gbm")
+    parser.add_argument("--search-strategy", type=str, default="grid")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--time-budget-seconds", type=float, default=600)
+    parser.add_argument("--base-model-version", type=str, default="")
+    parser.add_argument("--incremental-n-estimators", type=int, default=50)
+    parser.add_argument("--memory-budget-mb", type=float, default=0)
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--compile-model", type=int, default=1)
+    parser.add_argument("--compile-check-rows", type=int, default=10_000)
 
     # Data, model, and output directories
     parser.add_argument(
@@ -29,72 +49,356 @@ if __name__ == "__main__":
     )
     parser.add_argument("--model-dir", type=str, default=os.environ.get("SM_MODEL_DIR"))
     parser.add_argument("--train", type=str, default=os.environ.get("SM_CHANNEL_TRAIN"))
+    parser.add_argument(
+        "--base-model", type=str, default=os.environ.get("SM_CHANNEL_BASE_MODEL")
+    )
 
     args, _ = parser.parse_known_args()
 
-    dataset_trn = pd.read_csv(
-        filepath_or_buffer=args.train,
-        index_col=False,
-        engine="python",
+    # training-only dependencies; the module level is also the serving entry
+    # point, which does not need sklearn when a compiled model is served
+    from compiler import compile_model
+    from dataio import TARGET, read_dataset, sample_dataset
+    from incremental import ENGINES, continue_training
+    from outofcore import fit_out_of_core
+    from profiler import Profile, search_candidates
+    from search import build_search, count_fits
+    from sklearn.ensemble import (
+        GradientBoostingClassifier,
+        HistGradientBoostingClassifier,
     )
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
 
-    X_train = dataset_trn.drop(columns=["target"])
-    y_train = dataset_trn["target"]
+    profile = Profile()
+    profile.record(engine=args.engine)
 
-    pipeline = Pipeline(
-        [
-            ("imputer", SimpleImputer()),
-            ("scaler", StandardScaler()),
-            ("classifier", GradientBoostingClassifier()),
-        ]
-    )
+    if args.base_model:
+        with profile.timer("data_load"):
+            dataset_trn = read_dataset(args.train)
+        X_train = dataset_trn.drop(columns=[TARGET])
+        y_train = dataset_trn[TARGET]
 
-    param_grid = {
-        "classifier__n_estimators": [int(el) for el in args.n_estimators.split(" ")],
-        "classifier__learning_rate": [
-            float(el) for el in args.learning_rate.split(" ")
-        ],
-        "classifier__max_depth": [int(el) for el in args.max_depth.split(" ")],
-    }
-
-    logger.info("Training model...")
-    grid_search = GridSearchCV(
-        estimator=pipeline,
-        param_grid=param_grid,
-        scoring="accuracy",
-        cv=3,
-        refit=True,
-    )
-    grid_search.fit(X=X_train, y=y_train)
+        logger.info(
+            f"Continuing training of base model version {args.base_model_version} "
+            f"with {args.incremental_n_estimators} more trees on {len(X_train)} new rows..."
+        )
+        with tarfile.open(os.path.join(args.base_model, "model.tar.gz")) as tar:
+            tar.extractall(path=args.base_model)
+        model = joblib.load(os.path.join(args.base_model, "model.joblib"))
 
-    logger.info(
-        f"best_params: {grid_search.best_params_}, "
-        f"cv_accuracy: {grid_search.best_score_}"
-    )
+        profile.record(engine=ENGINES[type(model[-1])])
+        with profile.timer("training"):
+            missing_labels = continue_training(
+                model=model,
+                X=X_train,
+                y=y_train,
+                n_estimators=args.incremental_n_estimators,
+            )
+        if missing_labels.size:
+            logger.warning(
+                f"Incremental data has no rows of classes {missing_labels.tolist()}."
+            )
+
+        n_rows = len(dataset_trn)
+        profile.record(
+            mode="incremental",
+            base_model_version=args.base_model_version,
+            missing_classes=missing_labels.tolist(),
+        )
+        logger.info(
+            f"base_model_version: {args.base_model_version}, "
+            f"training_seconds: {profile.timings['training_seconds']:.2f}"
+        )
+    elif args.engine == "sgd":
+        # out of core: the data is streamed in chunks and never fully loaded,
+        # so data loading is part of the training time
+        logger.info(
+            f"Training sgd model out of core in chunks of {args.chunk_rows} rows "
+            f"for {args.epochs} epochs..."
+        )
+        with profile.timer("training"):
+            model, n_rows = fit_out_of_core(
+                path=args.train, chunk_rows=args.chunk_rows, epochs=args.epochs
+            )
+
+        profile.record(mode="out_of_core", epochs=args.epochs)
+        logger.info(
+            f"n_rows: {n_rows}, "
+            f"training_seconds: {profile.timings['training_seconds']:.2f}"
+        )
+    else:
+        with profile.timer("data_load"):
+            if args.memory_budget_mb > 0:
+                dataset_trn, n_total_rows = sample_dataset(
+                    path=args.train,
+                    chunk_rows=args.chunk_rows,
+                    memory_budget_mb=args.memory_budget_mb,
+                )
+                logger.info(
+                    f"Sampled {len(dataset_trn)} of {n_total_rows} rows to fit the "
+                    f"memory budget of {args.memory_budget_mb} MB."
+                )
+            else:
+                dataset_trn = read_dataset(args.train)
+        X_train = dataset_trn.drop(columns=[TARGET])
+        y_train = dataset_trn[TARGET]
+        n_rows = len(X_train)
+
+        if args.engine == "gbm":
+            pipeline = Pipeline(
+                [
+                    ("imputer", SimpleImputer()),
+                    ("scaler", StandardScaler()),
+                    ("classifier", GradientBoostingClassifier()),
+                ]
+            )
+            n_estimators_param = "classifier__n_estimators"
+        elif args.engine == "hist":
+            # histogram-based boosting is multithreaded and handles missing values
+            # natively; trees need no scaling, so the classifier is the only step
+            pipeline = Pipeline(
+                [
+                    (
+                        "classifier",
+                        HistGradientBoostingClassifier(
+                            early_stopping=True, random_state=42
+                        ),
+                    ),
+                ]
+            )
+            # with early stopping, the number of trees is an upper bound
+            n_estimators_param = "classifier__max_iter"
+        else:
+            raise ValueError(
+                f"Unknown engine '{args.engine}'; must be gbm, hist or sgd."
+            )
 
-    joblib.dump(
-        grid_search.best_estimator_, os.path.join(args.model_dir, "model.joblib")
+        param_grid = {
+            n_estimators_param: [int(el) for el in args.n_estimators.split(" ")],
+            "classifier__learning_rate": [
+                float(el) for el in args.learning_rate.split(" ")
+            ],
+            "classifier__max_depth": [int(el) for el in args.max_depth.split(" ")],
+        }
+
+        logger.info(
+            f"Training {args.engine} model with '{args.search_strategy}' search..."
+        )
+
+        # the imputer and scaler do not depend on any searched hyperparameter, so
+        # their fitted outputs are cached on local disk and reused by every
+        # candidate fitted on the same fold
+        with tempfile.TemporaryDirectory(prefix="pipeline-cache-") as cache_dir:
+            pipeline.set_params(memory=cache_dir)
+            search = build_search(
+                strategy=args.search_strategy,
+                pipeline=pipeline,
+                param_grid=param_grid,
+                n_jobs=args.n_jobs,
+                time_budget=args.time_budget_seconds,
+            )
+            with profile.timer("training"):
+                search.fit(X=X_train, y=y_train)
+
+        model = search.best_estimator_.set_params(memory=None)
+
+        profile.record(
+            mode="search",
+            search_strategy=args.search_strategy,
+            n_fits=count_fits(search),
+            best_params=search.best_params_,
+            cv_accuracy=search.best_score_,
+            candidates=search_candidates(search),
+        )
+        logger.info(
+            f"search_strategy: {args.search_strategy}, "
+            f"search_seconds: {profile.timings['training_seconds']:.2f}, "
+            f"n_fits: {count_fits(search)}"
+        )
+        logger.info(
+            f"best_params: {search.best_params_}, cv_accuracy: {search.best_score_}"
+        )
+
+    model_path = os.path.join(args.model_dir, "model.joblib")
+    joblib.dump(model, model_path)
+
+    if args.compile_model:
+        with profile.timer("compile"):
+            compiled = compile_model(model)
+
+        if compiled is not None:
+            # compiled predictions allocate a few (rows, trees) arrays, so they
+            # are checked on a bounded sample of the training data, in batches
+            check_rows = X_train.sample(
+                n=min(len(X_train), args.compile_check_rows), random_state=42
+            )
+            matches = all(
+                np.array_equal(compiled.predict(batch), model.predict(batch))
+                for batch in (
+                    check_rows.iloc[start : start + 1000]
+                    for start in range(0, len(check_rows), 1000)
+                )
+            )
+
+        if compiled is None:
+            logger.info("No compiled serving representation for this model.")
+        elif not matches:
+            logger.warning(
+                "Compiled model predictions differ from the pipeline; "
+                "serving the pipeline instead."
+            )
+        else:
+            compiled.save(os.path.join(args.model_dir, "compiled"))
+            logger.info("Saved compiled serving representation of the model.")
+
+    profile.record(
+        n_rows=n_rows,
+        rows_per_second=n_rows / profile.timings["training_seconds"],
+        model_joblib_size_bytes=os.path.getsize(model_path),
     )
+    profile.write(os.path.join(args.model_dir, "profile.json"))
 
 
 def model_fn(model_dir):
-    model = joblib.load(os.path.join(model_dir, "model.joblib"))
+    start = time.perf_counter()
+    model = _load_model(model_dir)
+    READINESS["model_load_seconds"] = time.perf_counter() - start
+    READINESS["model_type"] = type(model).__name__
+
+    # score a synthetic batch at load time, which sagemaker does before the
+    # endpoint takes traffic, so the first request does not pay for lazy
+    # imports and first-call overheads
+    warmup_rows = int(os.environ.get("SERVING_WARMUP_ROWS", 0))
+    if warmup_rows > 0:
+        start = time.perf_counter()
+        batch = _warmup_batch(warmup_rows)
+        if hasattr(model, "warm_up"):
+            model.warm_up(batch)  # compiled trees and their fallback pipeline
+        else:
+            predict_fn(batch, model)
+        READINESS["warmup_seconds"] = time.perf_counter() - start
+        READINESS["warmup_rows"] = warmup_rows
+
+    logger.info(f"Model ready: {READINESS}")
     return model
 
 
+def _load_model(model_dir):
+    # the compiled trees load memory-mapped and predict without sklearn
+    compiled_dir = os.path.join(model_dir, "compiled")
+    if os.path.isdir(compiled_dir):
+        from compiler import CompiledTrees
+
+        return CompiledTrees.load(
+            compiled_dir, fallback_path=os.path.join(model_dir, "model.joblib")
+        )
+
+    return joblib.load(os.path.join(model_dir, "model.joblib"))
+
+
+def _warmup_batch(n_rows):
+    # spread over a range of feature values, with missing values, so that
+    # the imputer and both sides of the tree splits are exercised
+    batch = np.linspace(0.0, 8.0, n_rows * N_FEATURES, dtype=FEATURE_DTYPE)
+    batch = batch.reshape(n_rows, N_FEATURES)
+    batch[::2, 0] = np.nan
+    return batch
+
+
 def input_fn(request_body, request_content_type):
-    if request_content_type == "application/json":
-        request_body = json.loads(request_body)
-        input = request_body["Input"]
-        return input
+    # request bodies may be gzip-compressed by the client; sagemaker does not
+    # forward the Content-Encoding header, so sniff the gzip magic bytes
+    if isinstance(request_body, str):
+        request_body = request_body.encode()
+    if request_body[:2] == b"\x1f\x8b":
+        request_body = gzip.decompress(request_body)
+
+    if request_content_type == READINESS_CONTENT_TYPE:
+        return READINESS
+    elif request_content_type == "application/json":
+        input = np.array(_json_loads(request_body)["Input"], dtype=FEATURE_DTYPE)
+    elif request_content_type == "application/x-npy":
+        input = _npy_frombuffer(request_body)
+    elif request_content_type == "text/csv":
+        input = np.loadtxt(
+            io.BytesIO(request_body), delimiter=",", ndmin=2, dtype=FEATURE_DTYPE
+        )
     else:
-        raise ValueError("This model only supports application/json input")
+        raise ValueError(
+            "This model only supports application/json, application/x-npy "
+            "and text/csv input"
+        )
+
+    if input.ndim != 2 or input.shape[1] != N_FEATURES:
+        raise ValueError(
+            f"Expected rows of {N_FEATURES} features, got an array of shape "
+            f"{input.shape}."
+        )
+
+    # one contiguous float32 array, the dtype the model was trained on
+    return np.ascontiguousarray(input, dtype=FEATURE_DTYPE)
 
 
 def predict_fn(input_data, model):
+    if input_data is READINESS:
+        return READINESS
     return model.predict(input_data)
 
 
 def output_fn(prediction, content_type):
-    output = {"Output": prediction.tolist()}
-    return output
+    if prediction is READINESS:
+        return _json_dumps(prediction), READINESS_CONTENT_TYPE
+
+    prediction = np.ascontiguousarray(prediction)
+    if content_type == "application/x-npy":
+        buffer = io.BytesIO()
+        np.save(buffer, prediction, allow_pickle=False)
+        return buffer.getvalue(), content_type
+    elif content_type == "text/csv":
+        buffer = io.BytesIO()
+        np.savetxt(buffer, prediction, fmt="%s")
+        return buffer.getvalue(), content_type
+
+    return _json_dumps({"Output": prediction}), "application/json"
+
+
+def _npy_frombuffer(body):
+    # read the array straight from the request bytes instead of copying them
+    # through a file object first
+    buffer = io.BytesIO(body)
+    if np.lib.format.read_magic(buffer) == (1, 0):
+        header = np.lib.format.read_array_header_1_0(buffer)
+    else:
+        header = np.lib.format.read_array_header_2_0(buffer)
+    shape, fortran_order, dtype = header
+    if dtype.hasobject:
+        raise ValueError("Object arrays are not supported.")
+
+    input = np.frombuffer(body, dtype=dtype, offset=buffer.tell())
+    return input.reshape(shape, order="F" if fortran_order else "C")
+
+
+try:
+    import orjson
+
+    def _json_loads(body):
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # NaN is not valid json, but python's json module writes it for
+            # missing values
+            return json.loads(body)
+
+    def _json_dumps(obj):
+        # serializes numpy arrays natively, without converting them to lists
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+
+except ImportError:
+
+    def _json_loads(body):
+        return json.loads(body)
+
+    def _json_dumps(obj):
+        return json.dumps(obj, default=lambda value: value.tolist()).encode()
@@ -16,8 +16,18 @@ from steps.monitor import (
     extract_captured_data,
     fetch_model_monitoring_data,
 )
-from steps.predictor import predict_iris
+from steps.predictor import (
+    CachingPredictor,
+    EndpointPredictor,
+    LocalPredictor,
+    Predictor,
+    RequestCoalescer,
+    get_coalescer,
+    get_predictor,
+    predict_iris,
+)
 from steps.registerer import model_registerer
 from steps.splitter import train_data_splitter
+from steps.streamer import S3MultipartWriter, list_s3_objects, stream_predictions
 from steps.trainer import model_trainer
 from steps.uploader import data_uploader
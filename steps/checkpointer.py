@@ -0,0 +1,78 @@
+import json
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from botocore.exceptions import ClientError
+
+from utils.helper import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class InferenceManifest:
+    input_path: str
+    input_etag: str
+    chunk_size: int
+    model_version: str | None = None
+    # first chunk index (as a string, for json) -> first_chunk, last_chunk,
+    # start_row, end_row, key and size of the part holding the scored
+    # chunks first_chunk to last_chunk
+    completed: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    def is_valid_for(
+        self, input_etag: str, chunk_size: int, model_version: str
+    ) -> bool:
+        return (
+            self.input_etag == input_etag
+            and self.chunk_size == chunk_size
+            and self.model_version == model_version
+        )
+
+    def scored_chunks(self) -> set[int]:
+        return {
+            index
+            for part in self.completed.values()
+            for index in range(part["first_chunk"], part["last_chunk"] + 1)
+        }
+
+
+def load_manifest(s3_client: Any, bucket: str, key: str) -> InferenceManifest | None:
+    try:
+        body = s3_client.get_object(Bucket=bucket, Key=key)["Body"].read()
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+            return None
+        raise
+
+    return InferenceManifest(**json.loads(body))
+
+
+def save_manifest(
+    s3_client: Any, bucket: str, key: str, manifest: InferenceManifest
+) -> None:
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=json.dumps(asdict(manifest)).encode(),
+        ContentType="application/json",
+    )
+
+    return None
+
+
+def delete_checkpoint(
+    s3_client: Any, bucket: str, manifest_key: str, manifest: InferenceManifest
+) -> None:
+    keys = [part["key"] for part in manifest.completed.values()] + [manifest_key]
+
+    for start in range(0, len(keys), 1000):  # delete_objects takes 1000 keys at most
+        s3_client.delete_objects(
+            Bucket=bucket,
+            Delete={
+                "Objects": [{"Key": key} for key in keys[start : start + 1000]],
+                "Quiet": True,
+            },
+        )
+
+    return None
@@ -1,4 +1,7 @@
-from sagemaker.workflow.conditions import ConditionGreaterThanOrEqualTo
+from sagemaker.workflow.conditions import (
+    ConditionGreaterThanOrEqualTo,
+    ConditionLessThanOrEqualTo,
+)
 from sagemaker.workflow.condition_step import ConditionStep
 from sagemaker.workflow.functions import JsonGet
 from sagemaker.workflow.steps import ProcessingStep
@@ -11,6 +14,8 @@ def model_registry_condition(
     evaluation_report: PropertyFile,
     model_registering_step: RegisterModel,
     register_accuracy_threshold: float,
+    register_latency_budget_ms: float | None = None,
+    register_model_size_budget_mb: float | None = None,
 ) -> ConditionStep:
 
     register_condition = ConditionGreaterThanOrEqualTo(
@@ -21,10 +26,35 @@ def model_registry_condition(
         ),
         right=register_accuracy_threshold,
     )
+    conditions = [register_condition]
+
+    # a model must also be fast and small enough to serve
+    if register_latency_budget_ms is not None:
+        conditions.append(
+            ConditionLessThanOrEqualTo(
+                left=JsonGet(
+                    step_name=model_evaluation_step.name,
+                    property_file=evaluation_report,
+                    json_path="serving_metrics.latency.batch_1.p99_ms",
+                ),
+                right=register_latency_budget_ms,
+            )
+        )
+    if register_model_size_budget_mb is not None:
+        conditions.append(
+            ConditionLessThanOrEqualTo(
+                left=JsonGet(
+                    step_name=model_evaluation_step.name,
+                    property_file=evaluation_report,
+                    json_path="serving_metrics.model_archive_size_bytes",
+                ),
+                right=register_model_size_budget_mb * 2**20,
+            )
+        )
 
     model_registering_condition_step = ConditionStep(
         name="model-registry-condition-step",
-        conditions=[register_condition],
+        conditions=conditions,
         if_steps=[model_registering_step],
         else_steps=[],
     )
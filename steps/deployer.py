@@ -117,9 +117,14 @@ def deploy_model(
     data_capture_destination_uri: str,
     serverless: bool,
     serverless_inference_config: dict | None = None,
+    warmup_rows: int = 0,
 ) -> None:
     endpoint_name = f"{endpoint_name}-{dt.now().strftime('%Y-%m-%d-%H-%M-%S')}"
 
+    # read by model_fn, which warms the model up before the endpoint takes
+    # traffic; this matters most for serverless cold starts
+    latest_model.model.env["SERVING_WARMUP_ROWS"] = str(warmup_rows)
+
     if serverless and serverless_inference_config:
         logger.info(
             "Deploying model in serverless mode with the following configuration:\n"
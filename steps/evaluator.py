@@ -24,6 +24,7 @@ def model_evaluator(
     model_training_step: TrainingStep,
     test_data_uri: str,
     code_location: str,
+    evaluation_arguments: dict,
 ) -> tuple[PropertyFile, ProcessingStep]:
     sklearn_processor = FrameworkProcessor(
         estimator_cls=SKLearn,
@@ -41,6 +42,11 @@ def model_evaluator(
     step_args = sklearn_processor.run(
         code="evaluate.py",
         source_dir="./scripts",
+        arguments=[
+            arg
+            for name, value in evaluation_arguments.items()
+            for arg in (f"--{name}", str(value))
+        ],
         inputs=[
             ProcessingInput(
                 source=model_training_step.properties.ModelArtifacts.S3ModelArtifacts,
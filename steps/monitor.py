@@ -1,7 +1,10 @@
+import base64
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime as dt
 from typing import Any
 
+import numpy as np
 import pandas as pd
 from evidently.metric_preset import (
     ClassificationPreset,
@@ -14,7 +17,12 @@ from sagemaker.model_monitor import DefaultModelMonitor
 from sagemaker.model_monitor.dataset_format import DatasetFormat
 from sagemaker.session import Session
 
+from steps.streamer import list_s3_objects
+from utils.codec import FEATURE_CONTENT_TYPES, decode_features, decode_predictions
 from utils.constants import DataField
+from utils.helper import get_logger, read_csv_data
+
+logger = get_logger(__name__)
 
 
 def create_data_drift_baseline(
@@ -75,13 +83,18 @@ def extract_captured_data(
     s3_bucket_name: str,
     data_capture_prefix: str,
     endpoint_name: str,
+    max_workers: int,
 ) -> tuple[pd.DataFrame, str | None]:
     # get objects in the captured data uri
     current_endpoint_capture_prefix = "{}/{}".format(data_capture_prefix, endpoint_name)
-    result = s3_client.list_objects_v2(
-        Bucket=s3_bucket_name, Prefix=current_endpoint_capture_prefix
-    )
-    captured_files = [file.get("Key") for file in result.get("Contents")]
+    captured_files = [
+        obj["Key"]
+        for obj in list_s3_objects(
+            s3_client=s3_client,
+            bucket=s3_bucket_name,
+            prefix=current_endpoint_capture_prefix,
+        )
+    ]
 
     # handle the case when no data has been captured by the endpoint
     if not captured_files:
@@ -95,20 +108,70 @@ def extract_captured_data(
             .decode("utf-8")
         )
 
+    def get_capture_payload(capture):
+        # binary payloads (e.g. application/x-npy or gzip-compressed requests)
+        # are captured base64-encoded; json and csv are captured as text
+        data = capture["data"]
+        if capture.get("encoding") == "BASE64":
+            return base64.b64decode(data), capture["observedContentType"]
+        return data.encode(), capture["observedContentType"]
+
+    def parse_capture_file(obj_key):
+        # a capture file holds one json record per line, one per invocation
+        features = []
+        targets = []
+        n_skipped = 0
+        for line in get_obj_body(obj_key).splitlines():
+            if not line.strip():
+                continue
+            try:
+                body = json.loads(line)
+                # readiness probes to the endpoint are captured too
+                content_type = body["captureData"]["endpointInput"][
+                    "observedContentType"
+                ]
+                if content_type.split(";")[0].strip() not in FEATURE_CONTENT_TYPES:
+                    continue
+                record_features = decode_features(
+                    *get_capture_payload(body["captureData"]["endpointInput"])
+                )
+                record_targets = decode_predictions(
+                    *get_capture_payload(body["captureData"]["endpointOutput"])
+                )
+            except (KeyError, TypeError, ValueError):
+                # a malformed record should not fail the whole report
+                n_skipped += 1
+                continue
+            features.append(record_features)
+            targets.extend(record_targets)
+
+        if n_skipped:
+            logger.warning(
+                f"Skipped {n_skipped} undecodable records in "
+                f"s3://{s3_bucket_name}/{obj_key}."
+            )
+        return features, targets
+
+    # downloads are i/o bound, so fetch and parse files concurrently; boto3
+    # clients are thread-safe and the pool bounds the open connections
     features = []
     targets = []
+    with ThreadPoolExecutor(
+        max_workers=min(max_workers, len(captured_files))
+    ) as executor:
+        # map yields results in the order of the files
+        for file_features, file_targets in executor.map(
+            parse_capture_file, captured_files
+        ):
+            features.extend(file_features)
+            targets.extend(file_targets)
+
+    # capture files can be empty or hold only readiness probes
+    if not features:
+        return pd.DataFrame(), "Error: no data found in the captured dir"
 
-    for obj_key in captured_files:
-        body = json.loads(get_obj_body(obj_key).split("\n")[0])
-        features.extend(
-            json.loads(body["captureData"]["endpointInput"]["data"])["Input"]
-        )
-        targets.extend(
-            json.loads(body["captureData"]["endpointOutput"]["data"])["Output"]
-        )
-
-    result = pd.DataFrame(data=features, columns=DataField.FEATURES)
-    result = result.astype(float)
+    result = pd.DataFrame(data=np.concatenate(features), columns=DataField.FEATURES)
+    result = result.astype(DataField.FEATURE_DTYPE)
 
     result[DataField.TARGET] = targets
 
@@ -163,11 +226,13 @@ def fetch_model_monitoring_data(
     # is also fetched
 
     try:
-        baseline_data = pd.read_csv(
-            baseline_data_s3_uri
+        baseline_data = read_csv_data(
+            path=baseline_data_s3_uri,
+            columns=(*DataField.FEATURES, DataField.TARGET),
         )  # this contains the true targets and features
-        current_data = pd.read_csv(
-            current_data_s3_uri
+        current_data = read_csv_data(
+            path=current_data_s3_uri,
+            columns=(*DataField.FEATURES, DataField.PREDICTION, DataField.TARGET),
         )  # this contains features, true targets and model predictions.
 
         err = None
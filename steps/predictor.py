@@ -1,24 +1,588 @@
-import boto3
+import importlib.util
 import json
+import os
+import queue
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from types import ModuleType
+
+import boto3
+import numpy as np
+import pandas as pd
+from botocore.config import Config
+from botocore.exceptions import ClientError, ConnectionError, HTTPClientError
+
+from utils.cache import PredictionCache
+from utils.codec import decode_predictions, encode_features
+from utils.constants import (
+    Coalesce,
+    ContentType,
+    PredictionBackend,
+    Predict,
+    PredictCache,
+)
+from utils.resilience import CircuitBreaker, RetryPolicy, TokenBucket
+
+SERVING_SCRIPT_PATH = Path(__file__).resolve().parents[1] / "scripts" / "train.py"
+RETRYABLE_ERROR_CODES = {
+    "ThrottlingException",
+    "ServiceUnavailable",
+    "InternalFailure",
+    "ModelNotReadyException",
+}
+
+
+class EndpointPredictor:
+    """
+    Thread-safe predictor around a pooled sagemaker-runtime client, shared by
+    every caller in the process.
+    """
+
+    def __init__(
+        self,
+        max_pool_connections: int,
+        connect_timeout: float,
+        read_timeout: float,
+        tcp_keepalive: bool,
+        max_payload_bytes: int,
+        max_workers: int,
+        max_attempts: int,
+        retry_base_delay: float,
+        retry_max_delay: float,
+        rate_limit_per_second: float,
+        rate_limit_burst: int,
+        circuit_failure_threshold: int,
+        circuit_recovery_seconds: float,
+        content_type: str,
+        accept: str,
+        compress: bool,
+    ) -> None:
+        self.max_payload_bytes = max_payload_bytes
+        self.max_workers = max_workers
+        self.rate_limit_per_second = rate_limit_per_second
+        self.rate_limit_burst = rate_limit_burst
+        self.circuit_failure_threshold = circuit_failure_threshold
+        self.circuit_recovery_seconds = circuit_recovery_seconds
+        self._retry_policy = RetryPolicy(
+            max_attempts=max_attempts,
+            base_delay=retry_base_delay,
+            max_delay=retry_max_delay,
+        )
+        self.content_type = content_type
+        self.accept = accept
+        self.compress = compress
+
+        # boto3 clients are thread-safe once created, but client creation
+        # through the default session is not; use a dedicated session.
+        self._session = boto3.session.Session()
+        self._runtime_client = self._session.client(
+            "sagemaker-runtime",
+            config=Config(
+                max_pool_connections=max_pool_connections,
+                connect_timeout=connect_timeout,
+                read_timeout=read_timeout,
+                tcp_keepalive=tcp_keepalive,
+                # retries are handled by the resilience layer in _invoke_resilient
+                retries={"mode": "standard", "max_attempts": 1},
+            ),
+        )
+        self._sm_client = None
+        self._model_versions: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._rate_limiters: dict[str, TokenBucket] = {}
+        self._circuit_breakers: dict[str, CircuitBreaker] = {}
+        self._resilience_lock = threading.Lock()
+
+    def model_version(self, endpoint_name: str) -> str:
+        """
+        Model package version served by the endpoint, or its config name.
+        """
+        # endpoint names are timestamped on every deployment, so the model
+        # behind a given endpoint name is resolved only once
+        with self._lock:
+            if endpoint_name in self._model_versions:
+                return self._model_versions[endpoint_name]
+
+            if self._sm_client is None:
+                self._sm_client = self._session.client("sagemaker")
+
+            endpoint_config_name = self._sm_client.describe_endpoint(
+                EndpointName=endpoint_name
+            )["EndpointConfigName"]
+            model_name = self._sm_client.describe_endpoint_config(
+                EndpointConfigName=endpoint_config_name
+            )["ProductionVariants"][0]["ModelName"]
+            model_package_arn = (
+                self._sm_client.describe_model(ModelName=model_name)
+                .get("PrimaryContainer", {})
+                .get("ModelPackageName")
+            )
+
+            self._model_versions[endpoint_name] = (
+                model_package_arn.split("/", 1)[-1]  # "<group name>/<version>"
+                if model_package_arn
+                else endpoint_config_name
+            )
+
+            return self._model_versions[endpoint_name]
+
+    def readiness(self, endpoint_name: str) -> dict:
+        """
+        Model load and warm-up durations reported by the endpoint.
+        """
+        response = self._runtime_client.invoke_endpoint(
+            EndpointName=endpoint_name,
+            ContentType=ContentType.READINESS,
+            Accept=ContentType.READINESS,
+            Body=b"{}",
+        )
+
+        return json.loads(response["Body"].read())
+
+    def predict(
+        self,
+        request_body: dict[str, list[list[float]]],
+        endpoint_name: str,
+    ) -> list[int]:
+        return self._invoke_resilient(
+            payload=self._encode(rows=request_body["Input"]),
+            endpoint_name=endpoint_name,
+        )
+
+    def predict_batch(
+        self,
+        request_body: dict[str, list[list[float]]],
+        endpoint_name: str,
+    ) -> list[int]:
+        """
+        Invoke the endpoint concurrently on chunks of the rows.
+        """
+        payloads = self._chunk_payloads(rows=request_body["Input"])
+
+        if len(payloads) == 1:
+            return self._invoke_resilient(
+                payload=payloads[0], endpoint_name=endpoint_name
+            )
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(payloads))
+        ) as executor:
+            # map yields results in submission order, which is the row order
+            chunk_predictions = executor.map(
+                lambda payload: self._invoke_resilient(
+                    payload=payload, endpoint_name=endpoint_name
+                ),
+                payloads,
+            )
+
+            return [prediction for chunk in chunk_predictions for prediction in chunk]
+
+    def _encode(self, rows: list[list[float]]) -> bytes:
+        return encode_features(
+            rows=rows, content_type=self.content_type, compress=self.compress
+        )
+
+    def _chunk_payloads(self, rows: list[list[float]]) -> list[bytes]:
+        if len(rows) == 0:
+            return [self._encode(rows=rows)]
+
+        # estimate the number of rows per chunk from a sample of rows, then
+        # bisect any chunk whose serialized payload still exceeds the limit
+        sample = rows[:1000]
+        bytes_per_row = len(self._encode(rows=sample)) / len(sample)
+        rows_per_chunk = max(1, int(self.max_payload_bytes / bytes_per_row))
+
+        payloads = []
+        pending = [
+            rows[start : start + rows_per_chunk]
+            for start in range(0, len(rows), rows_per_chunk)
+        ][::-1]
+
+        while pending:
+            chunk = pending.pop()
+            payload = self._encode(rows=chunk)
+
+            if len(payload) > self.max_payload_bytes and len(chunk) > 1:
+                middle = len(chunk) // 2
+                pending.extend([chunk[middle:], chunk[:middle]])
+                continue
+
+            payloads.append(payload)
+
+        return payloads
+
+    def _invoke_resilient(self, payload: bytes, endpoint_name: str) -> list[int]:
+        """
+        Invoke the endpoint with retries, rate limiting and a circuit breaker.
+        """
+        with self._resilience_lock:
+            if endpoint_name not in self._circuit_breakers:
+                self._rate_limiters[endpoint_name] = TokenBucket(
+                    rate=self.rate_limit_per_second, capacity=self.rate_limit_burst
+                )
+                self._circuit_breakers[endpoint_name] = CircuitBreaker(
+                    failure_threshold=self.circuit_failure_threshold,
+                    recovery_timeout=self.circuit_recovery_seconds,
+                )
+            rate_limiter = self._rate_limiters[endpoint_name]
+            circuit_breaker = self._circuit_breakers[endpoint_name]
+
+        def attempt() -> list[int]:
+            circuit_breaker.allow()
+            rate_limiter.acquire()
+
+            try:
+                predictions = self._invoke(payload=payload, endpoint_name=endpoint_name)
+            except Exception as e:
+                if _is_retryable(e):
+                    circuit_breaker.record_failure()
+                else:
+                    # the endpoint answered (e.g. a validation error), so it is up
+                    circuit_breaker.record_success()
+                raise
+
+            circuit_breaker.record_success()
+            return predictions
+
+        return self._retry_policy.call(func=attempt, is_retryable=_is_retryable)
+
+    def _invoke(self, payload: bytes, endpoint_name: str) -> list[int]:
+        response = self._runtime_client.invoke_endpoint(
+            EndpointName=endpoint_name,
+            ContentType=self.content_type,
+            Accept=self.accept,
+            Body=payload,
+        )
+
+        return decode_predictions(
+            body=response["Body"].read(), content_type=response["ContentType"]
+        )
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, ClientError):
+        status_code = error.response.get("ResponseMetadata", {}).get(
+            "HTTPStatusCode", 0
+        )
+        return (
+            error.response.get("Error", {}).get("Code") in RETRYABLE_ERROR_CODES
+            or status_code == 429
+            or status_code >= 500
+        )
+
+    return isinstance(error, (ConnectionError, HTTPClientError))
+
+
+class LocalPredictor:
+    """
+    Score a local or s3 model artifact in-process with the endpoint's handlers.
+    """
+
+    def __init__(self, model_path: str) -> None:
+        self.model_path = model_path
+        self._model_dir = tempfile.TemporaryDirectory()
+        self._serving = _load_serving_module()
+        self._model = self._serving.model_fn(
+            self._resolve_model_dir(model_path=model_path)
+        )
+
+    def model_version(self, endpoint_name: str | None = None) -> str:
+        return self.model_path
+
+    def readiness(self, endpoint_name: str | None = None) -> dict:
+        input_data = self._serving.input_fn(b"{}", ContentType.READINESS)
+        body, _ = self._serving.output_fn(
+            self._serving.predict_fn(input_data, self._model), ContentType.READINESS
+        )
+
+        return json.loads(body)
+
+    def predict(
+        self,
+        request_body: dict[str, list[list[float]]],
+        endpoint_name: str | None = None,
+    ) -> list[int]:
+        payload = encode_features(
+            rows=request_body["Input"], content_type=ContentType.NPY
+        )
+        input_data = self._serving.input_fn(payload, ContentType.NPY)
+        prediction = self._serving.predict_fn(input_data, self._model)
+        body, content_type = self._serving.output_fn(prediction, ContentType.NPY)
+
+        return decode_predictions(body=body, content_type=content_type)
+
+    def predict_batch(
+        self,
+        request_body: dict[str, list[list[float]]],
+        endpoint_name: str | None = None,
+    ) -> list[int]:
+        # there is no payload limit in-process, so a batch is a single call
+        return self.predict(request_body=request_body, endpoint_name=endpoint_name)
+
+    def _resolve_model_dir(self, model_path: str) -> str:
+        if model_path.startswith("s3://"):
+            bucket, key = model_path.removeprefix("s3://").split("/", 1)
+            local_path = os.path.join(self._model_dir.name, os.path.basename(key))
+            boto3.session.Session().client("s3").download_file(bucket, key, local_path)
+            model_path = local_path
+
+        if model_path.endswith(".tar.gz"):
+            with tarfile.open(model_path) as tar:
+                tar.extractall(path=self._model_dir.name, filter="data")
+            return self._model_dir.name
+
+        if model_path.endswith(".joblib"):
+            return os.path.dirname(os.path.abspath(model_path))
+
+        return model_path
+
+
+class CachingPredictor:
+    """
+    Serve repeated rows from a PredictionCache, keyed by model version; cache
+    hits do not reach the endpoint, so they are not in its data capture.
+    """
+
+    def __init__(
+        self,
+        predictor: EndpointPredictor | LocalPredictor,
+        cache: PredictionCache,
+    ) -> None:
+        self.predictor = predictor
+        self.cache = cache
+
+    def model_version(self, endpoint_name: str | None = None) -> str:
+        return self.predictor.model_version(endpoint_name)
+
+    def predict(
+        self,
+        request_body: dict[str, list[list[float]]],
+        endpoint_name: str | None = None,
+    ) -> list[int]:
+        return self._predict(
+            request_body=request_body, endpoint_name=endpoint_name, batch=False
+        )
+
+    def predict_batch(
+        self,
+        request_body: dict[str, list[list[float]]],
+        endpoint_name: str | None = None,
+    ) -> list[int]:
+        return self._predict(
+            request_body=request_body, endpoint_name=endpoint_name, batch=True
+        )
+
+    def _predict(
+        self,
+        request_body: dict[str, list[list[float]]],
+        endpoint_name: str | None,
+        batch: bool,
+    ) -> list[int]:
+        rows = np.asarray(request_body["Input"], dtype=np.float64)
+        if len(rows) == 0:
+            return []
+
+        model_version = self.predictor.model_version(endpoint_name)
+        row_hashes = pd.util.hash_pandas_object(
+            pd.DataFrame(rows), index=False
+        ).tolist()
+        keys = [(model_version, row_hash) for row_hash in row_hashes]
+        predictions = self.cache.get_many(keys)
+
+        # identical rows that missed the cache are sent only once
+        missed = {}
+        for i, prediction in enumerate(predictions):
+            if prediction is None:
+                missed.setdefault(keys[i], i)
+
+        if missed:
+            missed_rows = rows[list(missed.values())]
+            predict = self.predictor.predict_batch if batch else self.predictor.predict
+            missed_predictions = predict(
+                request_body={"Input": missed_rows}, endpoint_name=endpoint_name
+            )
+            self.cache.put_many(keys=list(missed), values=missed_predictions)
+
+            missed_predictions = dict(zip(missed, missed_predictions))
+            predictions = [
+                missed_predictions[key] if prediction is None else prediction
+                for key, prediction in zip(keys, predictions)
+            ]
+
+        return predictions
+
+
+def _load_serving_module() -> ModuleType:
+    # mirror the serving container, which puts the script directory on the path
+    if str(SERVING_SCRIPT_PATH.parent) not in sys.path:
+        sys.path.append(str(SERVING_SCRIPT_PATH.parent))
+
+    spec = importlib.util.spec_from_file_location("iris_serving", SERVING_SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    return module
+
+
+Predictor = EndpointPredictor | LocalPredictor | CachingPredictor
+
+_predictors: dict[tuple[str, str | None], Predictor] = {}
+_predictors_lock = threading.Lock()
+
+
+def get_predictor(
+    backend: str = PredictionBackend.SAGEMAKER,
+    model_path: str | None = None,
+) -> Predictor:
+    """
+    Return the process-wide predictor for the backend, creating it on first use.
+    """
+    key = (backend, model_path)
+
+    with _predictors_lock:
+        if key not in _predictors:
+            if backend == PredictionBackend.SAGEMAKER:
+                _predictors[key] = EndpointPredictor(**Predict.ARGS)
+            elif backend == PredictionBackend.LOCAL:
+                if model_path is None:
+                    raise ValueError(
+                        "A model path is required for the local prediction backend."
+                    )
+                _predictors[key] = LocalPredictor(model_path=model_path)
+            else:
+                raise ValueError(f"Unknown prediction backend '{backend}'.")
+
+            if PredictCache.ARGS["max_size"] > 0:
+                _predictors[key] = CachingPredictor(
+                    predictor=_predictors[key],
+                    cache=PredictionCache(**PredictCache.ARGS),
+                )
+
+        return _predictors[key]
+
+
+class RequestCoalescer:
+    """
+    Batch single-row requests from concurrent callers into one predict call
+    per endpoint; each caller gets a Future of its prediction.
+    """
+
+    def __init__(
+        self,
+        predictor: Predictor,
+        max_batch_size: int,
+        max_wait_seconds: float,
+        max_in_flight: int,
+    ) -> None:
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.requests = 0
+        self.batches = 0
+        self._stats_lock = threading.Lock()
+        self._queue: queue.Queue[tuple[list[float], str, Future]] = queue.Queue()
+        # batches are dispatched in the background so that the next batch can
+        # be gathered while the previous ones are in flight
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_in_flight, thread_name_prefix="coalescer-dispatch"
+        )
+        self._thread = threading.Thread(
+            target=self._gather, name="coalescer-gather", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, row: list[float], endpoint_name: str) -> Future:
+        future = Future()
+        self._queue.put((row, endpoint_name, future))
+        return future
+
+    def _gather(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait_seconds
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch: list[tuple[list[float], str, Future]]) -> None:
+        requests_by_endpoint: dict[str, list[tuple[list[float], Future]]] = {}
+        for row, endpoint_name, future in batch:
+            # skip requests whose caller has given up waiting
+            if future.set_running_or_notify_cancel():
+                requests_by_endpoint.setdefault(endpoint_name, []).append((row, future))
+
+        for endpoint_name, requests in requests_by_endpoint.items():
+            with self._stats_lock:
+                self.requests += len(requests)
+                self.batches += 1
+
+            try:
+                predictions = self.predictor.predict(
+                    request_body={"Input": [row for row, _ in requests]},
+                    endpoint_name=endpoint_name,
+                )
+            except Exception as e:
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), prediction in zip(requests, predictions):
+                future.set_result(prediction)
+
+
+_coalescers: dict[tuple[str, str | None], RequestCoalescer] = {}
+
+
+def get_coalescer(
+    backend: str = PredictionBackend.SAGEMAKER,
+    model_path: str | None = None,
+) -> RequestCoalescer:
+    """
+    Return the process-wide request coalescer in front of get_predictor().
+    """
+    predictor = get_predictor(backend=backend, model_path=model_path)
+    key = (backend, model_path)
+
+    with _predictors_lock:
+        if key not in _coalescers:
+            _coalescers[key] = RequestCoalescer(predictor=predictor, **Coalesce.ARGS)
+
+        return _coalescers[key]
 
 
 def predict_iris(
     request_body: dict[str, list[list[float]]],
     endpoint_name: str,
+    batch: bool = False,
+    predictor: Predictor | None = None,
 ) -> list[int]:
     """
     example of a request body:
         request_body = {"Input": [[0.09178, 0.12, 4.05, 0.60], [0.09178, 0.560, 1.05, 2.0]]}
     """
 
-    runtime_client = boto3.client("sagemaker-runtime")
-    content_type = "application/json"
-    data = json.loads(json.dumps(request_body))
-    payload = json.dumps(data)
+    predictor = predictor or get_predictor()
 
-    response = runtime_client.invoke_endpoint(
-        EndpointName=endpoint_name, ContentType=content_type, Body=payload
-    )
-    result = json.loads(response["Body"].read().decode())["Output"]
+    if batch:
+        return predictor.predict_batch(
+            request_body=request_body,
+            endpoint_name=endpoint_name,
+        )
 
-    return result
+    return predictor.predict(
+        request_body=request_body,
+        endpoint_name=endpoint_name,
+    )
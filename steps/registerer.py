@@ -4,6 +4,8 @@ from sagemaker.workflow.functions import Join
 from sagemaker.workflow.steps import ProcessingStep, TrainingStep
 from sagemaker.sklearn import SKLearn
 
+from utils.constants import ContentType
+
 
 def model_registerer(
     model_training_step: TrainingStep,
@@ -11,6 +13,7 @@ def model_registerer(
     estimator: SKLearn,
     model_package_group_name: str,
     model_approval_status: str,
+    base_model_version: str | None = None,
 ) -> RegisterModel:
 
     model_metrics = ModelMetrics(
@@ -32,13 +35,18 @@ def model_registerer(
         name="model-registering-step",
         estimator=estimator,
         model_data=model_training_step.properties.ModelArtifacts.S3ModelArtifacts,
-        content_types=["application/json"],
-        response_types=["application/x-npy"],
+        content_types=[ContentType.JSON, ContentType.NPY, ContentType.CSV],
+        response_types=[ContentType.JSON, ContentType.NPY, ContentType.CSV],
         inference_instances=["ml.t2.medium", "ml.m5.xlarge", "ml.m5.large"],
         transform_instances=["ml.m5.xlarge"],
         model_package_group_name=model_package_group_name,
         approval_status=model_approval_status,
         model_metrics=model_metrics,
+        customer_metadata_properties=(
+            None
+            if base_model_version is None
+            else {"base_model_version": base_model_version}
+        ),
     )
 
     return model_registering_step
@@ -0,0 +1,340 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+import pandas as pd
+
+from steps.checkpointer import (
+    InferenceManifest,
+    delete_checkpoint,
+    load_manifest,
+    save_manifest,
+)
+from steps.predictor import Predictor, predict_iris
+from utils.constants import DataField, FileFormat
+from utils.helper import get_logger, iter_tabular_data, prepare_batch_prediction_data
+
+logger = get_logger(__name__)
+
+MIN_PART_SIZE = 5_242_880  # s3 minimum size of every multipart part but the last
+
+
+class S3MultipartWriter:
+    """
+    Append bytes and existing objects to an s3 object through a multipart
+    upload, which is aborted if the context exits with an exception.
+    """
+
+    def __init__(
+        self, s3_client: Any, bucket: str, key: str, part_size: int = 8_388_608
+    ) -> None:
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self._buffer = bytearray()
+        self._parts: list[dict[str, Any]] = []
+        self._upload_id: str | None = None
+
+    def __enter__(self) -> "S3MultipartWriter":
+        self._upload_id = self.s3_client.create_multipart_upload(
+            Bucket=self.bucket, Key=self.key
+        )["UploadId"]
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is not None:
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+            )
+            return None
+
+        if self._buffer or not self._parts:
+            self._upload_part(bytes(self._buffer))
+
+        self.s3_client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts},
+        )
+
+        return None
+
+    def write(self, data: bytes) -> None:
+        self._buffer.extend(data)
+
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+
+    def copy(self, key: str, size: int, last: bool = False) -> None:
+        """
+        Append another object in the bucket, server-side when it can be a part.
+        """
+        if len(self._buffer) >= MIN_PART_SIZE:
+            self._upload_part(bytes(self._buffer))
+            self._buffer.clear()
+        if self._buffer or (size < MIN_PART_SIZE and not last):
+            self.write(
+                self.s3_client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+            )
+            return None
+
+        part_number = len(self._parts) + 1
+        response = self.s3_client.upload_part_copy(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            CopySource={"Bucket": self.bucket, "Key": key},
+        )
+        self._parts.append(
+            {"ETag": response["CopyPartResult"]["ETag"], "PartNumber": part_number}
+        )
+
+        return None
+
+    def _upload_part(self, body: bytes) -> None:
+        part_number = len(self._parts) + 1
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+
+
+def list_s3_objects(s3_client: Any, bucket: str, prefix: str) -> list[dict[str, Any]]:
+    """
+    List every object under the prefix, across list_objects_v2 pages.
+    """
+    paginator = s3_client.get_paginator("list_objects_v2")
+
+    return [
+        obj
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix)
+        for obj in page.get("Contents", [])
+        if not obj["Key"].endswith("/")  # skip "folder" placeholder objects
+    ]
+
+
+def stream_predictions(
+    s3_client: Any,
+    input_bucket: str,
+    input_key: str,
+    input_format: FileFormat,
+    output_bucket: str,
+    output_key: str,
+    checkpoint_prefix: str,
+    endpoint_name: str,
+    predictor: Predictor,
+    chunk_size: int,
+    max_in_flight: int,
+    part_size: int = MIN_PART_SIZE,
+) -> tuple[int, str | None]:
+    """
+    Score the input file chunk by chunk into checkpointed parts, resuming a
+    failed run. Returns the number of scored rows and an error message, if any.
+    """
+    manifest_key = f"{checkpoint_prefix}/manifest.json"
+    input_etag = s3_client.head_object(Bucket=input_bucket, Key=input_key)["ETag"]
+    model_version = predictor.model_version(endpoint_name)
+    manifest = load_manifest(
+        s3_client=s3_client, bucket=output_bucket, key=manifest_key
+    )
+
+    if manifest is not None and manifest.is_valid_for(
+        input_etag=input_etag, chunk_size=chunk_size, model_version=model_version
+    ):
+        logger.info(
+            f"Resuming from {manifest_key}: "
+            f"{len(manifest.scored_chunks())} chunks are already scored."
+        )
+    else:
+        if manifest is not None:
+            # scored by another model or for another input; start over
+            delete_checkpoint(
+                s3_client=s3_client,
+                bucket=output_bucket,
+                manifest_key=manifest_key,
+                manifest=manifest,
+            )
+        manifest = InferenceManifest(
+            input_path=f"s3://{input_bucket}/{input_key}",
+            input_etag=input_etag,
+            chunk_size=chunk_size,
+            model_version=model_version,
+        )
+    scored_chunks = manifest.scored_chunks()
+
+    def score_chunk(index: int, chunk: pd.DataFrame) -> bytes:
+        chunk[DataField.PREDICTION] = predict_iris(
+            request_body={"Input": chunk.values},
+            endpoint_name=endpoint_name,
+            batch=True,
+            predictor=predictor,
+        )
+        return chunk.to_csv(index=False, header=index == 0).encode()
+
+    # consecutive scored chunks waiting to be written as one part
+    buffer = bytearray()
+    pending: dict[str, int] = {}  # first_chunk, last_chunk, start_row, end_row
+    merged_keys: list[str] = []  # parts read back into the buffer
+
+    def read_back(part: dict[str, Any]) -> None:
+        # parts written short by a failed run are merged with the chunks
+        # scored next to them, so that every part but the last can still be
+        # copied into the output server-side
+        del manifest.completed[str(part["first_chunk"])]
+        buffer.extend(
+            s3_client.get_object(Bucket=output_bucket, Key=part["key"])["Body"].read()
+        )
+        merged_keys.append(part["key"])
+
+        return None
+
+    def flush_buffer() -> None:
+        if not pending:
+            return None
+
+        part_key = (
+            f"{checkpoint_prefix}/part-{pending['first_chunk']:05d}"
+            f"-{pending['last_chunk']:05d}.csv"
+        )
+        s3_client.put_object(Bucket=output_bucket, Key=part_key, Body=bytes(buffer))
+
+        manifest.completed[str(pending["first_chunk"])] = dict(
+            **pending, key=part_key, size=len(buffer)
+        )
+        save_manifest(
+            s3_client=s3_client,
+            bucket=output_bucket,
+            key=manifest_key,
+            manifest=manifest,
+        )
+        if merged_keys:
+            s3_client.delete_objects(
+                Bucket=output_bucket,
+                Delete={
+                    "Objects": [{"Key": key} for key in merged_keys],
+                    "Quiet": True,
+                },
+            )
+        buffer.clear()
+        pending.clear()
+        merged_keys.clear()
+
+        return None
+
+    in_flight: deque[tuple[int, int, int, Future]] = deque()
+    errors: list[str] = []
+
+    def record_oldest_chunk() -> None:
+        index, start_row, end_row, future = in_flight.popleft()
+        try:
+            body = future.result()
+        except Exception as e:
+            # keep what is scored so far, so that a rerun resumes after it
+            errors.append(f"Rows {start_row} to {end_row}: error: {e}")
+            flush_buffer()
+            return None
+
+        # a part holds consecutive chunks only
+        if pending and pending["last_chunk"] != index - 1:
+            flush_buffer()
+        if not pending:
+            previous = next(
+                (
+                    part
+                    for part in manifest.completed.values()
+                    if part["last_chunk"] == index - 1 and part["size"] < part_size
+                ),
+                None,
+            )
+            if previous is not None:
+                read_back(previous)
+                pending.update(
+                    first_chunk=previous["first_chunk"], start_row=previous["start_row"]
+                )
+            else:
+                pending.update(first_chunk=index, start_row=start_row)
+        buffer.extend(body)
+        pending.update(last_chunk=index, end_row=end_row)
+
+        following = manifest.completed.get(str(index + 1))
+        while following is not None and len(buffer) < part_size:
+            read_back(following)
+            pending.update(
+                last_chunk=following["last_chunk"], end_row=following["end_row"]
+            )
+            following = manifest.completed.get(str(pending["last_chunk"] + 1))
+
+        if len(buffer) >= part_size:
+            flush_buffer()
+
+        return None
+
+    def finish() -> None:
+        while in_flight:
+            record_oldest_chunk()
+        flush_buffer()
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        chunks = iter_tabular_data(
+            path=manifest.input_path, file_format=input_format, chunk_size=chunk_size
+        )
+
+        # columnar chunks can be shorter than chunk_size, so rows are counted
+        next_row = 0
+        try:
+            for index, chunk in enumerate(chunks):
+                start_row, next_row = next_row, next_row + len(chunk)
+                if index in scored_chunks:
+                    continue
+
+                chunk, err = prepare_batch_prediction_data(uploaded_data=chunk)
+                if err is not None:
+                    finish()
+                    return 0, f"Rows {start_row} to {next_row - 1}: {err}"
+
+                in_flight.append(
+                    (
+                        index,
+                        start_row,
+                        next_row - 1,
+                        executor.submit(score_chunk, index, chunk),
+                    )
+                )
+                if len(in_flight) >= max_in_flight:
+                    record_oldest_chunk()
+                if errors:
+                    break
+        except ValueError as e:  # schema mismatch or unparsable values
+            finish()
+            return 0, f"error: {e}"
+
+        finish()
+        if errors:
+            return 0, errors[0]
+
+    parts = [manifest.completed[key] for key in sorted(manifest.completed, key=int)]
+    with S3MultipartWriter(
+        s3_client=s3_client, bucket=output_bucket, key=output_key
+    ) as writer:
+        for i, part in enumerate(parts):
+            writer.copy(key=part["key"], size=part["size"], last=i == len(parts) - 1)
+
+    delete_checkpoint(
+        s3_client=s3_client,
+        bucket=output_bucket,
+        manifest_key=manifest_key,
+        manifest=manifest,
+    )
+
+    n_rows = sum(part["end_row"] - part["start_row"] + 1 for part in parts)
+    logger.info(f"Scored {n_rows} rows in chunks of {chunk_size} rows.")
+
+    return n_rows, None
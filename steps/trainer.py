@@ -14,6 +14,7 @@ def model_trainer(
     instance_count: int,
     output_path: str,
     code_location: str,
+    base_model_uri: str | None = None,
 ) -> tuple[SKLearn, TrainingStep]:
     sklearn_estimator = SKLearn(
         role=role,
@@ -29,15 +30,20 @@ def model_trainer(
         code_location=code_location,
     )
 
+    inputs = {
+        "train": TrainingInput(
+            s3_data=train_data_uri,
+            content_type="text/csv",
+        ),
+    }
+    if base_model_uri is not None:
+        # model.tar.gz of the model to continue training from
+        inputs["base_model"] = TrainingInput(s3_data=base_model_uri)
+
     model_training_step = TrainingStep(
         name="model-training-step",
         estimator=sklearn_estimator,
-        inputs={
-            "train": TrainingInput(
-                s3_data=train_data_uri,
-                content_type="text/csv",
-            ),
-        },
+        inputs=inputs,
     )
 
     return sklearn_estimator, model_training_step
@@ -0,0 +1,38 @@
+import time
+
+import pytest
+
+from utils.cache import PredictionCache
+
+
+@pytest.fixture
+def cache() -> PredictionCache:
+    return PredictionCache(max_size=2, ttl_seconds=60)
+
+
+def test_hits_and_misses(cache):
+    assert cache.get_many(["a", "b"]) == [None, None]
+
+    cache.put_many(["a", "b"], [0, 1])
+
+    assert cache.get_many(["a", "b", "c"]) == [0, 1, None]
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 3
+
+
+def test_lru_eviction(cache):
+    cache.put_many(["a", "b"], [0, 1])
+    cache.get_many(["a"])  # "b" becomes the least recently used entry
+    cache.put_many(["c"], [2])
+
+    assert cache.get_many(["a", "b", "c"]) == [0, None, 2]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry():
+    cache = PredictionCache(max_size=2, ttl_seconds=0.01)
+    cache.put_many(["a"], [0])
+    time.sleep(0.02)
+
+    assert cache.get_many(["a"]) == [None]
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,78 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from steps.predictor import RequestCoalescer
+
+
+class FakePredictor:
+    def __init__(self, failing_endpoint: str | None = None) -> None:
+        self.failing_endpoint = failing_endpoint
+        self.calls: list[tuple[str, list[list[float]]]] = []
+        self._lock = threading.Lock()
+
+    def predict(self, request_body, endpoint_name):
+        with self._lock:
+            self.calls.append((endpoint_name, request_body["Input"]))
+        if endpoint_name == self.failing_endpoint:
+            raise ConnectionError("endpoint unavailable")
+        return [int(row[0]) for row in request_body["Input"]]
+
+
+def coalescer(predictor: FakePredictor, max_batch_size: int) -> RequestCoalescer:
+    # a long wait, so that batches are only cut by their size
+    return RequestCoalescer(
+        predictor=predictor,
+        max_batch_size=max_batch_size,
+        max_wait_seconds=5,
+        max_in_flight=2,
+    )
+
+
+def test_concurrent_submits_are_sent_as_one_batch():
+    predictor = FakePredictor()
+    requests = coalescer(predictor, max_batch_size=8)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = list(
+            executor.map(
+                lambda i: requests.submit(row=[i, 0, 0, 0], endpoint_name="a"),
+                range(8),
+            )
+        )
+
+    assert [future.result(timeout=5) for future in futures] == list(range(8))
+    assert len(predictor.calls) == 1
+    assert sorted(row[0] for row in predictor.calls[0][1]) == list(range(8))
+    assert (requests.requests, requests.batches) == (8, 1)
+
+
+def test_batches_are_split_by_endpoint():
+    predictor = FakePredictor()
+    requests = coalescer(predictor, max_batch_size=4)
+
+    futures = [
+        requests.submit(row=[i, 0, 0, 0], endpoint_name="ab"[i % 2]) for i in range(4)
+    ]
+
+    assert [future.result(timeout=5) for future in futures] == [0, 1, 2, 3]
+    assert sorted(predictor.calls) == [
+        ("a", [[0, 0, 0, 0], [2, 0, 0, 0]]),
+        ("b", [[1, 0, 0, 0], [3, 0, 0, 0]]),
+    ]
+
+
+def test_errors_are_set_on_the_futures_of_their_endpoint():
+    predictor = FakePredictor(failing_endpoint="b")
+    requests = coalescer(predictor, max_batch_size=4)
+
+    futures = [
+        requests.submit(row=[i, 0, 0, 0], endpoint_name="ab"[i % 2]) for i in range(4)
+    ]
+
+    assert futures[0].result(timeout=5) == 0
+    assert futures[2].result(timeout=5) == 2
+    for future in futures[1::2]:
+        with pytest.raises(ConnectionError, match="endpoint unavailable"):
+            future.result(timeout=5)
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from utils.codec import decode_features, decode_predictions, encode_features
+from utils.constants import ContentType
+
+
+@pytest.mark.parametrize("compress", [False, True])
+@pytest.mark.parametrize(
+    "content_type", [ContentType.JSON, ContentType.NPY, ContentType.CSV]
+)
+def test_features_round_trip(content_type, compress):
+    rows = [[5.1, 3.5, 1.4, 0.2], [6.7, 3.0, 5.2, 2.3]]
+
+    body = encode_features(rows=rows, content_type=content_type, compress=compress)
+    if compress:
+        assert body[:2] == b"\x1f\x8b"
+
+    # features are float32 whatever the wire format
+    decoded = decode_features(body, f"{content_type}; charset=utf-8")
+    np.testing.assert_array_equal(
+        decoded.astype(np.float32), np.array(rows, dtype=np.float32)
+    )
+
+
+def test_single_row_csv_keeps_two_dimensions():
+    body = encode_features(rows=[[5.1, 3.5, 1.4, 0.2]], content_type=ContentType.CSV)
+
+    assert decode_features(body, ContentType.CSV).shape == (1, 4)
+
+
+def test_unsupported_content_types_are_rejected():
+    with pytest.raises(ValueError, match="Unsupported content type"):
+        encode_features(rows=[[0.0] * 4], content_type="application/xml")
+    with pytest.raises(ValueError, match="Unsupported content type"):
+        decode_features(b"<rows/>", "application/xml")
+    with pytest.raises(ValueError, match="Unsupported content type"):
+        decode_predictions(b"<rows/>", "application/xml")
@@ -0,0 +1,80 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from scripts.compiler import CompiledTrees, compile_model
+
+
+@pytest.fixture
+def iris() -> tuple[pd.DataFrame, pd.Series]:
+    data = pd.read_csv(filepath_or_buffer="./data/train.csv", index_col=False)
+    X = data.drop(columns=["target"]).astype("float32")
+    X.iloc[::9, 1] = np.nan  # exercise missing value handling
+
+    return X, data["target"]
+
+
+@pytest.mark.parametrize(
+    "model",
+    [
+        Pipeline(
+            [
+                ("imputer", SimpleImputer()),
+                ("scaler", StandardScaler()),
+                ("classifier", GradientBoostingClassifier(n_estimators=20)),
+            ]
+        ),
+        Pipeline(
+            [("classifier", HistGradientBoostingClassifier(max_iter=20))],
+        ),
+    ],
+)
+def test_compiled_predictions_match(iris, model, tmp_path):
+    X, y = iris
+    model.fit(X, y)
+
+    compiled = compile_model(model)
+    compiled.save(tmp_path)
+    loaded = CompiledTrees.load(tmp_path)
+
+    for rows in (X, X.values.astype(np.float64), X.values.tolist()):
+        np.testing.assert_array_equal(loaded.predict(rows), model.predict(X))
+
+    binary = y.isin([1, 2])
+    model.fit(X[binary], y[binary])
+    np.testing.assert_array_equal(compile_model(model).predict(X), model.predict(X))
+
+
+def test_large_batches_use_the_pipeline(iris, tmp_path):
+    X, y = iris
+    model = Pipeline(
+        [("classifier", HistGradientBoostingClassifier(max_iter=20))],
+    ).fit(X, y)
+    joblib.dump(model, tmp_path / "model.joblib")
+    compile_model(model).save(tmp_path / "compiled")
+
+    compiled = CompiledTrees.load(
+        tmp_path / "compiled", fallback_path=tmp_path / "model.joblib"
+    )
+    batch = pd.concat([X] * 100, ignore_index=True)
+
+    np.testing.assert_array_equal(compiled.predict(batch), model.predict(batch))
+    assert compiled._fallback is not None
+
+
+def test_unsupported_model_is_not_compiled(iris):
+    X, y = iris
+    model = Pipeline(
+        [
+            ("imputer", SimpleImputer()),
+            ("classifier", SGDClassifier()),
+        ]
+    ).fit(X, y)
+
+    assert compile_model(model) is None
@@ -0,0 +1,5 @@
+import os
+
+# utils.constants creates boto3 clients at import time, which only needs a
+# region; tests run before any aws configuration
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
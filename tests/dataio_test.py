@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+from scripts import dataio, train
+from utils.constants import DataField
+from utils.helper import read_csv_data
+
+
+def test_script_schema_mirrors_datafield():
+    assert dataio.FEATURES == DataField.FEATURES
+    assert dataio.TARGET == DataField.TARGET
+    assert dataio.PREDICTION == DataField.PREDICTION
+    assert dataio.FEATURE_DTYPE == DataField.FEATURE_DTYPE
+    assert dataio.LABEL_DTYPE == DataField.LABEL_DTYPE
+
+    # the serving handlers do not import pandas, so not dataio either
+    assert train.N_FEATURES == len(DataField.FEATURES)
+    assert train.FEATURE_DTYPE == DataField.FEATURE_DTYPE
+
+
+def test_read_csv_data_types_columns(tmp_path):
+    path = tmp_path / "predictions.csv"
+    pd.read_csv("./data/test.csv").assign(**{DataField.PREDICTION: 0}).to_csv(
+        path, index=False
+    )
+
+    data = read_csv_data(
+        path=path, columns=(*DataField.FEATURES, DataField.TARGET, DataField.PREDICTION)
+    )
+
+    assert (data[list(DataField.FEATURES)].dtypes == DataField.FEATURE_DTYPE).all()
+    assert data[DataField.TARGET].dtype == DataField.LABEL_DTYPE
+    assert data[DataField.PREDICTION].dtype == DataField.LABEL_DTYPE
+
+    with pytest.raises(ValueError, match="Column names are invalid"):
+        dataio.read_dataset(path)
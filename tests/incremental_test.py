@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from scripts.incremental import continue_training
+
+
+@pytest.fixture
+def iris() -> tuple[pd.DataFrame, pd.Series]:
+    data = pd.read_csv(filepath_or_buffer="./data/train.csv", index_col=False)
+    data = data.sample(frac=1.0, random_state=42, ignore_index=True)
+
+    return data.drop(columns=["target"]).astype("float32"), data["target"]
+
+
+def test_boosted_trees_are_added_on_new_data(iris):
+    X, y = iris
+    half = len(X) // 2
+    model = Pipeline(
+        [
+            ("imputer", SimpleImputer()),
+            ("scaler", StandardScaler()),
+            ("classifier", GradientBoostingClassifier(n_estimators=20)),
+        ]
+    ).fit(X[:half], y[:half])
+
+    new = y[half:] != 2
+    missing_labels = continue_training(
+        model=model, X=X[half:][new], y=y[half:][new], n_estimators=10
+    )
+
+    assert missing_labels.tolist() == [2]
+    assert model[-1].n_estimators_ == 30
+    assert model[-1].classes_.tolist() == [0, 1, 2]
+    assert (model.predict(X) == y).mean() > 0.9
+
+
+def test_hist_model_is_not_warm_started(iris):
+    X, y = iris
+    half = len(X) // 2
+    model = Pipeline([("classifier", HistGradientBoostingClassifier(max_iter=20))]).fit(
+        X[:half], y[:half]
+    )
+
+    with pytest.raises(ValueError, match="cannot be trained incrementally"):
+        continue_training(model=model, X=X[half:], y=y[half:], n_estimators=10)
+    assert model[-1].n_iter_ == 20
+
+
+def test_new_labels_are_rejected(iris):
+    X, y = iris
+    known = y != 2
+    model = Pipeline([("classifier", GradientBoostingClassifier(n_estimators=20))]).fit(
+        X[known], y[known]
+    )
+
+    with pytest.raises(ValueError, match=r"Labels \[2\]"):
+        continue_training(model=model, X=X, y=y, n_estimators=10)
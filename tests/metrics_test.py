@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from sklearn.metrics import (
+    accuracy_score,
+    confusion_matrix,
+    f1_score,
+    precision_score,
+    recall_score,
+)
+
+from scripts.metrics import bootstrap_metrics, classification_metrics, confusion_counts
+
+
+@pytest.fixture
+def labels() -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 3, size=500)
+    y_pred = np.where(rng.random(500) < 0.8, y_true, rng.integers(0, 3, size=500))
+    y_pred[y_pred == 2] = 1  # a class that is never predicted
+
+    return y_true, y_pred
+
+
+def test_metrics_match_sklearn(labels):
+    y_true, y_pred = labels
+    metrics = classification_metrics(confusion_matrix(y_true, y_pred))
+
+    assert metrics["accuracy"] == pytest.approx(accuracy_score(y_true, y_pred))
+    for name, score in (
+        ("precision", precision_score),
+        ("recall", recall_score),
+        ("f1", f1_score),
+    ):
+        expected = score(y_true, y_pred, average="weighted", zero_division=0)
+        assert metrics[name] == pytest.approx(expected)
+
+
+def test_confusion_counts_add_up_over_chunks(labels):
+    y_true, y_pred = labels
+    classes = np.array([0, 1, 2])
+    counts = sum(
+        confusion_counts(
+            y_true[start : start + 64], y_pred[start : start + 64], classes
+        )
+        for start in range(0, len(y_true), 64)
+    )
+
+    np.testing.assert_array_equal(counts, confusion_matrix(y_true, y_pred))
+
+    with pytest.raises(ValueError):
+        confusion_counts(np.array([3]), np.array([0]), classes)
+
+
+def test_bootstrap_matches_row_resampling(labels):
+    y_true, y_pred = labels
+    intervals = bootstrap_metrics(confusion_matrix(y_true, y_pred), n_resamples=2000)
+
+    # reference: resample the rows themselves
+    rng = np.random.default_rng(1)
+    accuracies = [
+        accuracy_score(y_true[rows], y_pred[rows])
+        for rows in rng.integers(0, len(y_true), size=(2000, len(y_true)))
+    ]
+
+    accuracy = intervals["accuracy"]
+    assert accuracy["standard_deviation"] == pytest.approx(np.std(accuracies), rel=0.1)
+    assert accuracy["confidence_interval"]["lower"] < accuracy_score(y_true, y_pred)
+    assert accuracy["confidence_interval"]["upper"] > accuracy_score(y_true, y_pred)
@@ -0,0 +1,98 @@
+import base64
+import io
+import json
+
+import numpy as np
+
+from steps.monitor import extract_captured_data
+from utils.codec import encode_features
+from utils.constants import DataField
+
+
+class FakePaginator:
+    def __init__(self, keys: list[str]) -> None:
+        self.keys = keys
+
+    def paginate(self, Bucket, Prefix):
+        keys = [key for key in self.keys if key.startswith(Prefix)]
+        for start in range(0, len(keys), 1000):
+            yield {"Contents": [{"Key": key} for key in keys[start : start + 1000]]}
+
+
+class FakeS3Client:
+    def __init__(self, objects: dict[str, str]) -> None:
+        self.objects = objects
+
+    def get_paginator(self, operation_name):
+        return FakePaginator(sorted(self.objects))
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self.objects[Key].encode())}
+
+
+def capture_record(content_type: str, payload: bytes, output: dict) -> str:
+    return json.dumps(
+        {
+            "captureData": {
+                "endpointInput": {
+                    "observedContentType": content_type,
+                    "mode": "INPUT",
+                    "data": base64.b64encode(payload).decode(),
+                    "encoding": "BASE64",
+                },
+                "endpointOutput": {
+                    "observedContentType": "application/json",
+                    "mode": "OUTPUT",
+                    "data": json.dumps(output),
+                    "encoding": "JSON",
+                },
+            }
+        }
+    )
+
+
+def test_extract_captured_data_skips_non_feature_records():
+    rows = np.arange(4, dtype=np.float32).reshape(1, 4)
+    objects = {
+        f"capture/endpoint/{i:04d}.jsonl": capture_record(
+            "application/x-npy",
+            encode_features(rows, "application/x-npy"),
+            {"Output": [i % 3]},
+        )
+        for i in range(1001)
+    }
+    objects["capture/endpoint/"] = ""  # folder placeholder
+    objects["capture/endpoint/probe.jsonl"] = "\n".join(
+        [
+            capture_record(
+                "application/vnd.readiness+json", b"{}", {"model_load_seconds": 1}
+            ),
+            capture_record("application/x-npy", b"not an array", {"Output": [0]}),
+        ]
+    )
+
+    data, err = extract_captured_data(
+        s3_client=FakeS3Client(objects),
+        s3_bucket_name="bucket",
+        data_capture_prefix="capture",
+        endpoint_name="endpoint",
+        max_workers=8,
+    )
+
+    assert err is None
+    assert len(data) == 1001
+    np.testing.assert_array_equal(data[list(DataField.FEATURES)].values[0], rows[0])
+    assert data[DataField.TARGET].tolist() == [i % 3 for i in range(1001)]
+
+
+def test_extract_captured_data_without_records():
+    data, err = extract_captured_data(
+        s3_client=FakeS3Client({"capture/endpoint/empty.jsonl": ""}),
+        s3_bucket_name="bucket",
+        data_capture_prefix="capture",
+        endpoint_name="endpoint",
+        max_workers=8,
+    )
+
+    assert data.empty
+    assert err == "Error: no data found in the captured dir"
@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from utils.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, TokenBucket
+
+
+def test_retry_policy_retries_retryable_errors():
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise TimeoutError
+        return "ok"
+
+    policy = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.01)
+
+    assert policy.call(flaky, is_retryable=lambda e: True) == "ok"
+    assert len(calls) == 3
+
+
+def test_retry_policy_raises_non_retryable_errors_immediately():
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise ValueError
+
+    policy = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.01)
+
+    with pytest.raises(ValueError):
+        policy.call(failing, is_retryable=lambda e: False)
+    assert len(calls) == 1
+
+
+def test_token_bucket_allows_burst_up_to_capacity():
+    rate = 20
+    bucket = TokenBucket(rate=rate, capacity=3)
+
+    start = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    burst = time.monotonic() - start
+
+    start = time.monotonic()
+    bucket.acquire()  # the bucket is empty, so this waits for a refill
+    refill = time.monotonic() - start
+
+    assert burst < 0.5 / rate
+    # tokens refilled during the burst shorten the wait slightly
+    assert refill >= 0.8 / rate
+
+
+def test_circuit_breaker_opens_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0)
+
+    breaker.record_failure()
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open
+
+    breaker.allow()  # recovery timeout elapsed: a single trial call is allowed
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    breaker.record_success()
+    assert not breaker.is_open
@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+from sklearn.pipeline import Pipeline
+from sklearn.tree import DecisionTreeClassifier
+
+from scripts.search import (
+    SEARCH_STRATEGIES,
+    TimeBudgetedRandomSearchCV,
+    build_search,
+    count_fits,
+)
+
+PARAM_GRID = {
+    "classifier__max_depth": [1, 2, 3],
+    "classifier__min_samples_leaf": [1, 2],
+}
+
+
+class CountingClassifier(DecisionTreeClassifier):
+    # searches clone the estimator, so fits are counted on the class
+    n_fits = 0
+
+    def fit(self, X, y, sample_weight=None, check_input=True):
+        CountingClassifier.n_fits += 1
+        return super().fit(X, y, sample_weight=sample_weight, check_input=check_input)
+
+
+@pytest.fixture
+def iris() -> tuple[pd.DataFrame, pd.Series]:
+    data = pd.read_csv(filepath_or_buffer="./data/train.csv", index_col=False)
+
+    return data.drop(columns=["target"]), data["target"]
+
+
+@pytest.fixture
+def pipeline() -> Pipeline:
+    CountingClassifier.n_fits = 0
+
+    return Pipeline([("classifier", CountingClassifier(random_state=42))])
+
+
+@pytest.mark.parametrize("strategy", SEARCH_STRATEGIES)
+def test_count_fits_matches_the_fits_run(iris, pipeline, strategy):
+    X, y = iris
+    search = build_search(
+        strategy=strategy,
+        pipeline=pipeline,
+        param_grid=PARAM_GRID,
+        n_jobs=1,  # fits run in this process, where they are counted
+        time_budget=600,
+    )
+
+    search.fit(X, y)
+
+    assert count_fits(search) == CountingClassifier.n_fits
+
+
+def test_random_search_stops_after_the_first_batch_without_budget(iris, pipeline):
+    X, y = iris
+    search = TimeBudgetedRandomSearchCV(
+        estimator=pipeline,
+        param_distributions=PARAM_GRID,
+        time_budget=0,
+        n_iter=6,
+        batch_size=2,
+        random_state=42,
+        cv=3,
+        n_jobs=1,
+    )
+
+    search.fit(X, y)
+
+    assert len(search.cv_results_["params"]) == 2
+    assert count_fits(search) == CountingClassifier.n_fits == 2 * 3 + 1
+    assert search.best_params_ in search.cv_results_["params"]
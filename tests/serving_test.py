@@ -0,0 +1,85 @@
+import gzip
+import io
+
+import numpy as np
+import pytest
+
+from scripts.train import input_fn, output_fn
+from utils.codec import decode_predictions, encode_features
+from utils.constants import ContentType
+
+
+@pytest.fixture
+def rows() -> np.ndarray:
+    rows = np.linspace(0.1, 7.9, 12, dtype=np.float32).reshape(3, 4)
+    rows[1, 2] = 1 / 3  # not exactly representable in decimal
+    return rows
+
+
+def npy_body(array: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, array, allow_pickle=False)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("compress", [False, True])
+@pytest.mark.parametrize(
+    "content_type", [ContentType.JSON, ContentType.NPY, ContentType.CSV]
+)
+def test_features_round_trip(rows, content_type, compress):
+    body = encode_features(rows=rows, content_type=content_type, compress=compress)
+
+    input = input_fn(body, content_type)
+
+    assert input.dtype == np.float32
+    assert input.flags.c_contiguous
+    np.testing.assert_array_equal(input, rows)
+
+
+def test_npy_is_read_without_copying(rows):
+    input = input_fn(npy_body(rows), ContentType.NPY)
+
+    assert not input.flags.owndata
+
+
+@pytest.mark.parametrize(
+    "array",
+    [
+        lambda rows: np.asfortranarray(rows),
+        lambda rows: rows.astype(np.float64),
+        lambda rows: np.asfortranarray(rows.astype(np.float64)),
+    ],
+)
+def test_npy_layouts_and_dtypes_are_converted(rows, array):
+    input = input_fn(gzip.compress(npy_body(array(rows))), ContentType.NPY)
+
+    assert input.dtype == np.float32
+    assert input.flags.c_contiguous
+    np.testing.assert_array_equal(input, rows)
+
+
+@pytest.mark.parametrize(
+    "content_type", [ContentType.JSON, ContentType.NPY, ContentType.CSV]
+)
+def test_wrong_feature_count_is_rejected(rows, content_type):
+    body = encode_features(rows=rows[:, :3], content_type=content_type)
+
+    with pytest.raises(ValueError, match="Expected rows of 4 features"):
+        input_fn(body, content_type)
+
+
+def test_unsupported_content_type_is_rejected(rows):
+    with pytest.raises(ValueError, match="only supports"):
+        input_fn(b"<rows/>", "application/xml")
+
+
+@pytest.mark.parametrize(
+    "content_type", [ContentType.JSON, ContentType.NPY, ContentType.CSV]
+)
+def test_predictions_round_trip(content_type):
+    prediction = np.array([0, 2, 1, 1], dtype=np.int64)
+
+    body, response_content_type = output_fn(prediction, content_type)
+
+    assert response_content_type == content_type
+    assert decode_predictions(body, f"{content_type}; charset=utf-8") == [0, 2, 1, 1]
@@ -0,0 +1,171 @@
+import io
+import threading
+
+import pandas as pd
+import pytest
+from botocore.exceptions import ClientError
+
+import steps.streamer
+from steps.streamer import stream_predictions
+from utils.constants import DataField, FileFormat
+
+
+class FakeS3Client:
+    def __init__(self, objects: dict[str, bytes]) -> None:
+        self.objects = dict(objects)
+        self.get_keys: list[str] = []
+        self.calls: list[str] = []
+        self._uploads: dict[str, dict[int, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def head_object(self, Bucket, Key):
+        return {"ETag": f'"{hash(self.objects[Key])}"'}
+
+    def get_object(self, Bucket, Key):
+        self.get_keys.append(Key)
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        with self._lock:
+            self.objects[Key] = Body
+
+    def delete_objects(self, Bucket, Delete):
+        for obj in Delete["Objects"]:
+            self.objects.pop(obj["Key"], None)
+
+    def create_multipart_upload(self, Bucket, Key):
+        self._uploads[Key] = {}
+        return {"UploadId": Key}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.calls.append("upload_part")
+        self._uploads[UploadId][PartNumber] = Body
+        return {"ETag": str(PartNumber)}
+
+    def upload_part_copy(self, Bucket, Key, UploadId, PartNumber, CopySource):
+        self.calls.append("upload_part_copy")
+        self._uploads[UploadId][PartNumber] = self.objects[CopySource["Key"]]
+        return {"CopyPartResult": {"ETag": str(PartNumber)}}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self._uploads.pop(UploadId)
+        self.objects[Key] = b"".join(
+            parts[part["PartNumber"]] for part in MultipartUpload["Parts"]
+        )
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self._uploads.pop(UploadId)
+
+
+class FakePredictor:
+    def __init__(self, version: str = "1", fail_on_row: int | None = None) -> None:
+        self.version = version
+        self.fail_on_row = fail_on_row
+        self.scored_rows: list[int] = []
+
+    def model_version(self, endpoint_name):
+        return self.version
+
+    def predict_batch(self, request_body, endpoint_name):
+        rows = [int(row[0]) for row in request_body["Input"]]
+        if self.fail_on_row in rows:
+            raise ConnectionError("endpoint unavailable")
+        self.scored_rows.extend(rows)
+        return [row % 3 for row in rows]
+
+
+@pytest.fixture
+def data() -> pd.DataFrame:
+    # the first feature is the row number, to tell rows apart
+    data = pd.DataFrame(
+        {feature: range(200) for feature in DataField.FEATURES}, dtype="float32"
+    )
+    return data
+
+
+@pytest.fixture
+def s3_client(data, monkeypatch) -> FakeS3Client:
+    s3_client = FakeS3Client({"input.csv": data.to_csv(index=False).encode()})
+
+    # read the input from the fake client rather than through s3fs
+    def iter_tabular_data(path, file_format, chunk_size):
+        body = s3_client.objects[path.removeprefix("s3://bucket/")]
+        yield from pd.read_csv(io.BytesIO(body), dtype="float32", chunksize=chunk_size)
+
+    monkeypatch.setattr(steps.streamer, "iter_tabular_data", iter_tabular_data)
+    # small parts, so that the 200 test rows make several of them
+    monkeypatch.setattr(steps.streamer, "MIN_PART_SIZE", 1000)
+
+    return s3_client
+
+
+def run(s3_client: FakeS3Client, predictor: FakePredictor) -> tuple[int, str | None]:
+    return stream_predictions(
+        s3_client=s3_client,
+        input_bucket="bucket",
+        input_key="input.csv",
+        input_format=FileFormat.CSV,
+        output_bucket="bucket",
+        output_key="output.csv",
+        checkpoint_prefix="checkpoints",
+        endpoint_name="endpoint",
+        predictor=predictor,
+        chunk_size=10,
+        max_in_flight=3,
+        part_size=steps.streamer.MIN_PART_SIZE,
+    )
+
+
+def expected_output(data: pd.DataFrame) -> pd.DataFrame:
+    return data.assign(**{DataField.PREDICTION: data.iloc[:, 0].astype(int) % 3})
+
+
+def test_parts_are_assembled_server_side(s3_client, data):
+    n_rows, err = run(s3_client, FakePredictor())
+
+    assert err is None
+    assert n_rows == len(data)
+    output = pd.read_csv(io.BytesIO(s3_client.objects["output.csv"]), dtype="float32")
+    pd.testing.assert_frame_equal(output, expected_output(data), check_dtype=False)
+
+    # every part is copied, none is downloaded again
+    assert set(s3_client.calls) == {"upload_part_copy"}
+    assert len(s3_client.calls) > 1
+    assert s3_client.get_keys == ["checkpoints/manifest.json"]
+    assert not [key for key in s3_client.objects if key.startswith("checkpoints/")]
+
+
+def test_rerun_resumes_after_a_scoring_failure(s3_client, data):
+    n_rows, err = run(s3_client, FakePredictor(fail_on_row=120))
+
+    assert n_rows == 0
+    assert "Rows 120 to 129" in err and "endpoint unavailable" in err
+
+    s3_client.get_keys.clear()
+    s3_client.calls.clear()
+    predictor = FakePredictor()
+    n_rows, err = run(s3_client, predictor)
+
+    assert err is None
+    assert n_rows == len(data)
+    # chunks scored before the failure are not scored again
+    assert min(predictor.scored_rows) >= 120
+    # only the parts written short around the failed chunk are read back,
+    # and the output is still assembled server-side
+    downloaded = [key for key in s3_client.get_keys if key.endswith(".csv")]
+    assert 0 < len(downloaded) <= 2
+    assert set(s3_client.calls) == {"upload_part_copy"}
+    output = pd.read_csv(io.BytesIO(s3_client.objects["output.csv"]), dtype="float32")
+    pd.testing.assert_frame_equal(output, expected_output(data), check_dtype=False)
+
+
+def test_new_model_version_rescores_everything(s3_client, data):
+    run(s3_client, FakePredictor(fail_on_row=120))
+
+    predictor = FakePredictor(version="2")
+    n_rows, err = run(s3_client, predictor)
+
+    assert err is None
+    assert sorted(predictor.scored_rows) == list(range(len(data)))
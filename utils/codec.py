@@ -0,0 +1,82 @@
+import gzip
+import io
+import json
+
+import numpy as np
+
+from utils.constants import ContentType, DataField
+
+GZIP_MAGIC = b"\x1f\x8b"
+# content types of requests that carry features, as opposed to e.g.
+# readiness probes
+FEATURE_CONTENT_TYPES = (ContentType.JSON, ContentType.CSV, ContentType.NPY)
+
+
+def encode_features(
+    rows: list[list[float]] | np.ndarray,
+    content_type: str,
+    compress: bool = False,
+) -> bytes:
+    if content_type == ContentType.JSON:
+        rows = rows.tolist() if isinstance(rows, np.ndarray) else rows
+        body = json.dumps({"Input": rows}).encode()
+    elif content_type == ContentType.NPY:
+        # the dtype the model serves with, so the endpoint reads the array
+        # straight from the request body without converting it
+        buffer = io.BytesIO()
+        np.save(
+            buffer,
+            np.ascontiguousarray(rows, dtype=DataField.FEATURE_DTYPE),
+            allow_pickle=False,
+        )
+        body = buffer.getvalue()
+    elif content_type == ContentType.CSV:
+        buffer = io.BytesIO()
+        np.savetxt(
+            buffer,
+            np.asarray(rows, dtype=DataField.FEATURE_DTYPE).reshape(len(rows), -1),
+            fmt="%.9g",  # enough digits to round-trip float32
+            delimiter=",",
+        )
+        body = buffer.getvalue()
+    else:
+        raise ValueError(f"Unsupported content type '{content_type}'.")
+
+    if compress:
+        # level 1 keeps compression cheap relative to the payload savings
+        body = gzip.compress(body, compresslevel=1)
+
+    return body
+
+
+def decode_features(body: bytes, content_type: str) -> np.ndarray:
+    if body[:2] == GZIP_MAGIC:
+        body = gzip.decompress(body)
+
+    content_type = content_type.split(";")[0].strip()
+
+    if content_type == ContentType.JSON:
+        return np.asarray(json.loads(body)["Input"], dtype=np.float64)
+    if content_type == ContentType.NPY:
+        return np.load(io.BytesIO(body), allow_pickle=False)
+    if content_type == ContentType.CSV:
+        return np.loadtxt(io.BytesIO(body), delimiter=",", ndmin=2)
+
+    raise ValueError(f"Unsupported content type '{content_type}'.")
+
+
+def decode_predictions(body: bytes, content_type: str) -> list[int]:
+    if body[:2] == GZIP_MAGIC:
+        body = gzip.decompress(body)
+
+    # the content type of the response may carry parameters, e.g. "; charset=utf-8"
+    content_type = content_type.split(";")[0].strip()
+
+    if content_type == ContentType.JSON:
+        return json.loads(body)["Output"]
+    if content_type == ContentType.NPY:
+        return np.load(io.BytesIO(body), allow_pickle=False).tolist()
+    if content_type == ContentType.CSV:
+        return np.loadtxt(io.BytesIO(body), dtype=np.int64, ndmin=1).tolist()
+
+    raise ValueError(f"Unsupported content type '{content_type}'.")
@@ -26,6 +26,24 @@ class ModelAPprovalStatus(StrEnum):
     REJECTED = "Rejected"
 
 
+class PredictionBackend(StrEnum):
+    SAGEMAKER = auto()  # remote sagemaker endpoint
+    LOCAL = auto()  # in-process model artifact
+
+
+class ContentType(StrEnum):
+    JSON = "application/json"
+    CSV = "text/csv"
+    NPY = "application/x-npy"
+    READINESS = "application/vnd.readiness+json"
+
+
+class FileFormat(StrEnum):
+    CSV = auto()
+    PARQUET = auto()
+    ARROW = auto()  # arrow ipc file (feather v2)
+
+
 class DataField:
     FEATURES = (
         "sepal length (cm)",
@@ -35,6 +53,8 @@ class DataField:
     )
     TARGET = "target"
     PREDICTION = "prediction"
+    FEATURE_DTYPE = "float32"
+    LABEL_DTYPE = "int8"  # target and prediction classes
 
 
 class Shared:
@@ -86,22 +106,56 @@ class Train:
             pipeline_name=Shared.PIPELINE_NAME,
             session=Shared.SESSION,
             role=Shared.ROLE,
+            sm_client=Shared.SM_CLIENT,
             s3_bucket_name=Shared.S3_BUCKET_NAME,
             project_s3_prefix=Shared.PROJECT_S3_PREFIX,
             train_data_uri=Shared.TRAIN_DATA_S3_URI,
             test_data_uri=Shared.TEST_DATA_S3_URI,
+            # new labelled data only, used by incremental training
+            incremental_train_data_uri=f"s3://{Shared.S3_BUCKET_NAME}/{Shared.TRAIN_KEY_PREFIX}/incremental/train.csv",
             hyperparameters={
                 "n-estimators": "100 200 300",
                 "learning-rate": "0.1 0.01",
                 "max-depth": "2 4 6",
+                # gbm, hist (histogram-based, for large data) or sgd (linear,
+                # trained out of core on data larger than instance memory)
+                "engine": "gbm",
+                "search-strategy": "grid",  # grid, halving or random
+                "n-jobs": -1,  # all cores of the training instance
+                "time-budget-seconds": 600,  # random search only
+                "incremental-n-estimators": 50,  # trees added by incremental training
+                # gbm and hist train on a random sample that fits this budget;
+                # 0 loads all data
+                "memory-budget-mb": 0,
+                "chunk-rows": 100_000,  # rows read at a time when streaming data
+                "epochs": 5,  # passes over the data for sgd
+                # also save boosted trees as flat arrays for faster serving
+                "compile-model": 1,
+                # training rows on which compiled predictions are checked
+                "compile-check-rows": 10_000,
                 "train": Shared.TRAIN_DATA_S3_URI,
             },
+            evaluation_arguments={
+                # resamples for the bootstrap standard deviations and confidence
+                # intervals of the test metrics; 0 skips the bootstrap
+                "bootstrap-resamples": 1000,
+                "confidence-level": 0.95,
+                "chunk-rows": 100_000,  # test rows scored at a time
+                # predict latency is benchmarked at each of these batch sizes
+                "benchmark-batch-sizes": "1 32 1024",
+                "benchmark-repeats": 100,
+            },
             framework_version="1.2-1",
             instance_type=Shared.INSTANCE_TYPE,
             instance_count=Shared.INSTANCE_COUNT,
             model_package_group_name=Shared.MODEL_PACKAGE_GROUP_NAME,
             model_approval_status=ModelAPprovalStatus.PENDING_MANUAL_APPROVAL,
             register_accuracy_threshold=0.8,
+            # optional serving budgets a model must also meet to be registered,
+            # e.g. 50.0 ms of p99 single-row latency and 100.0 MiB of
+            # model.tar.gz; None disables a budget
+            register_latency_budget_ms=None,
+            register_model_size_budget_mb=None,
             output_path=f"s3://{Shared.S3_BUCKET_NAME}/{Shared.PROJECT_S3_PREFIX}/pipeline_runs",
             code_location=f"s3://{Shared.S3_BUCKET_NAME}/{Shared.PROJECT_S3_PREFIX}/uploaded_codes",
         )
@@ -123,6 +177,8 @@ class Deploy:
                 "memory_size_in_mb": 1024,
                 "max_concurrency": 10,
             },
+            # rows of the synthetic batch scored when the model is loaded; 0 disables
+            warmup_rows=32,
         )
     )
 
@@ -136,6 +192,9 @@ class DataDrift:
             baseline_data_s3_uri=Shared.TRAIN_DATA_S3_URI,  # use train data  as baseline for data drift monitoring
             evidently_api_token=Shared.EVIDENTLY_API_TOKEN,
             evidently_propject_id=Shared.EVIDENTLY_PROJECT_ID,
+            # capture files downloaded concurrently; the s3 client keeps at
+            # most 10 connections open by default
+            max_workers=10,
         )
     )
 
@@ -164,10 +223,63 @@ class Clean:
     )
 
 
+class Predict:
+    # number of requests the deployed endpoint can serve at the same time
+    ENDPOINT_CONCURRENCY = (
+        Deploy.ARGS["serverless_inference_config"]["max_concurrency"]
+        * Deploy.ARGS["instance_count"]
+    )
+
+    ARGS = MappingProxyType(
+        dict(
+            max_pool_connections=ENDPOINT_CONCURRENCY,  # one pooled connection per concurrent endpoint invocation
+            connect_timeout=5,
+            read_timeout=60,
+            tcp_keepalive=True,
+            max_payload_bytes=5_242_880,  # 5 MiB; sagemaker caps request payloads at 6 MB
+            max_workers=ENDPOINT_CONCURRENCY,
+            max_attempts=4,
+            retry_base_delay=0.1,
+            retry_max_delay=5,
+            # the client-side rate limit allows bursts of as many requests as the
+            # endpoint can serve concurrently, refilled assuming ~200 ms per request
+            rate_limit_per_second=5 * ENDPOINT_CONCURRENCY,
+            rate_limit_burst=ENDPOINT_CONCURRENCY,
+            circuit_failure_threshold=5,
+            circuit_recovery_seconds=30,
+            content_type=ContentType.JSON,  # request wire format
+            accept=ContentType.JSON,  # response wire format
+            compress=False,  # gzip request bodies; the endpoint detects it
+        )
+    )
+
+
+class PredictCache:
+    ARGS = MappingProxyType(
+        dict(
+            # number of cached rows; 0 disables the prediction cache. Note that
+            # cached rows never reach the endpoint and so are not data captured.
+            max_size=0,
+            ttl_seconds=3600,
+        )
+    )
+
+
+class Coalesce:
+    ARGS = MappingProxyType(
+        dict(
+            max_batch_size=64,
+            max_wait_seconds=0.01,  # time a request may wait for others to join its batch
+            max_in_flight=Predict.ENDPOINT_CONCURRENCY,
+        )
+    )
+
+
 class Inference:
     ARGS = MappingProxyType(
         dict(
             session=Shared.SESSION,
+            s3_client=Shared.S3_CLIENT,
             input_path_prefix=f"{Shared.PROJECT_S3_PREFIX}/data/inference",
             output_path_prefix=f"{Shared.PROJECT_S3_PREFIX}/data/predictions",
         )
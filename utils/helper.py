@@ -1,9 +1,24 @@
 import logging
+from collections.abc import Iterator
+from pathlib import PurePosixPath
+from types import MappingProxyType
 
+import fsspec
 import pandas as pd
 import yaml
 
-from utils.constants import DataField
+from scripts.dataio import read_csv
+from utils.constants import DataField, FileFormat
+
+FILE_FORMAT_EXTENSIONS = MappingProxyType(
+    {
+        ".csv": FileFormat.CSV,
+        ".parquet": FileFormat.PARQUET,
+        ".pq": FileFormat.PARQUET,
+        ".arrow": FileFormat.ARROW,
+        ".feather": FileFormat.ARROW,
+    }
+)
 
 
 def load_yaml_file(path: str) -> dict:
@@ -90,20 +105,109 @@ def prepare_batch_prediction_data(
             f"Column names must be and ordered as {DataField.FEATURES}."
         )
 
-    # Check for strings
-    contains_strings = uploaded_data.map(lambda x: isinstance(x, str)).any().any()
+    # Check for strings; only non-numeric columns can hold them
+    contains_strings = (
+        uploaded_data.select_dtypes(exclude="number")
+        .map(lambda x: isinstance(x, str))
+        .any()
+        .any()
+    )
 
     # Check for NaN values
     contains_nan = uploaded_data.isnull().any().any()
 
     if contains_strings | contains_nan:
         return pd.DataFrame(), (
-            "Some values in the uploaded CSV contains strings and/or "
+            "Some values in the uploaded file contains strings and/or "
             "NaN values. Please check the file and re-upload."
         )
 
     return uploaded_data, None
 
 
+def get_file_format(path: str) -> FileFormat | None:
+    return FILE_FORMAT_EXTENSIONS.get(PurePosixPath(path).suffix.lower())
+
+
+def read_csv_data(
+    path: str, columns: tuple[str, ...], chunksize: int | None = None
+) -> pd.DataFrame | Iterator[pd.DataFrame]:
+    """
+    Read a csv whose header must be exactly columns, typed by DataField, with
+    the data-loading layer that the sagemaker scripts use as well.
+    """
+    return read_csv(path=path, columns=columns, chunksize=chunksize)
+
+
+def read_tabular_data(path: str, file_format: FileFormat) -> pd.DataFrame:
+    """
+    Read the features of a csv, parquet or arrow file as float32.
+    """
+    if file_format == FileFormat.PARQUET:
+        data = pd.read_parquet(path, columns=list(DataField.FEATURES))
+    elif file_format == FileFormat.ARROW:
+        data = pd.read_feather(path, columns=list(DataField.FEATURES))
+    else:
+        return read_csv_data(path=path, columns=DataField.FEATURES)
+
+    return data.astype(DataField.FEATURE_DTYPE)
+
+
+def read_batch_prediction_data(
+    path: str, file_format: FileFormat
+) -> tuple[pd.DataFrame, str | None]:
+    try:
+        data = read_tabular_data(path=path, file_format=file_format)
+        err = None
+    except ValueError as e:
+        data = pd.DataFrame()
+        err = f"error: {e}"
+
+    return data, err
+
+
+def iter_tabular_data(
+    path: str, file_format: FileFormat, chunk_size: int
+) -> Iterator[pd.DataFrame]:
+    """
+    Read the features of a csv, parquet or arrow file as float32, in chunks
+    of at most chunk_size rows.
+    """
+    if file_format == FileFormat.CSV:
+        yield from read_csv_data(
+            path=path, columns=DataField.FEATURES, chunksize=chunk_size
+        )
+        return
+
+    import pyarrow.dataset as ds  # pyarrow is only needed for columnar files
+
+    filesystem, fs_path = fsspec.core.url_to_fs(path)
+    dataset = ds.dataset(
+        fs_path,
+        format="parquet" if file_format == FileFormat.PARQUET else "ipc",
+        filesystem=filesystem,
+    )
+
+    for batch in dataset.to_batches(
+        columns=list(DataField.FEATURES), batch_size=chunk_size
+    ):
+        if batch.num_rows:
+            yield batch.to_pandas().astype(DataField.FEATURE_DTYPE)
+
+
+def write_tabular_data(data: pd.DataFrame, path: str, file_format: FileFormat) -> None:
+    """
+    Write a csv, or a zstd-compressed parquet or arrow file.
+    """
+    if file_format == FileFormat.PARQUET:
+        data.to_parquet(path, index=False, compression="zstd")
+    elif file_format == FileFormat.ARROW:
+        data.reset_index(drop=True).to_feather(path, compression="zstd")
+    else:
+        data.to_csv(path, index=False)
+
+    return None
+
+
 def get_iris_dictionary() -> dict[int, str]:
     return dict(zip([0, 1, 2], ["setosa", "versicolor", "virginica"]))